@@ -0,0 +1,113 @@
+"""Loading a year of exported history, whole and filtered.
+
+Writes a synthetic year with HistoryWriter: an incremental monitor check
+every hour (one page of 12 posts) plus a full archive crawl on the first of
+each month (--archive-posts posts over pages of 12). Then times:
+
+- write: all batches appended through HistoryWriter.flush()
+- load: every row
+- filtered: one company over the whole year, one badge over the last quarter
+- latest: each post's most recent row, the year's catalogue
+
+    python benchmarks/bench_history.py [--archive-posts 20000] [--output bench_history.json]
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PAGE_SIZE = 12
+BADGES = ("Good", "Bad", "Neutral")
+START = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class NoStore:
+    """first_seen() for a history written without a store: every post is new"""
+
+    def first_seen(self, post_ids):
+        return {}
+
+
+def synthetic_post(number):
+    return {
+        'title': f"Review {number} of a synthetic company",
+        'link': f"https://deshimula.com/story/{number}/review-{number}",
+        'company': f"Company {number % 500}",
+        'role': "Software Engineer",
+        'badges': [BADGES[number % 3]],
+    }
+
+
+def write_year(directory, archive_posts):
+    from dm_scraper.history import HistoryWriter
+
+    store = NoStore()
+    rows = 0
+    newest = archive_posts
+    for hour in range(365 * 24):
+        at = START + datetime.timedelta(hours=hour)
+        if at.day == 1 and at.hour == 0:
+            crawl = range(newest, newest - archive_posts, -1)
+        else:
+            newest += 1
+            crawl = range(newest, newest - PAGE_SIZE, -1)
+        writer = HistoryWriter(directory, store, crawled_at=at.timestamp())
+        posts = [synthetic_post(n) for n in crawl]
+        for page, start in enumerate(range(0, len(posts), PAGE_SIZE), 1):
+            writer.add(page, posts[start:start + PAGE_SIZE])
+        writer.flush()
+        rows += writer.written
+    return rows
+
+
+def timed_load(directory, **filters):
+    from dm_scraper.history import load_history
+
+    started = time.perf_counter()
+    rows = load_history(directory, **filters)
+    return time.perf_counter() - started, len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--archive-posts', type=int, default=20000, help="posts in each monthly archive crawl")
+    parser.add_argument('--output', default='bench_history.json', help="where to write the JSON results")
+    args = parser.parse_args()
+
+    os.environ['VERBOSE'] = '0'
+    directory = tempfile.mkdtemp(prefix='dm_bench_history_')
+    started = time.perf_counter()
+    rows = write_year(directory, args.archive_posts)
+    write_seconds = time.perf_counter() - started
+    size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+    print(f"🗄️ {rows} rows in {len(os.listdir(directory))} month files, {size / 2 ** 20:.1f} MiB, "
+          f"written in {write_seconds:.1f}s")
+
+    quarter = START + datetime.timedelta(days=273)
+    cases = {
+        'load': {},
+        'company': {'company': "company 42"},
+        'badge_last_quarter': {'badge': "good", 'since': quarter},
+        'latest': {'latest': True},
+    }
+    report = {'rows': rows, 'file_mib': size / 2 ** 20, 'write_seconds': write_seconds}
+    print(f"{'case':>20} {'seconds':>8} {'rows':>8}")
+    for name, filters in cases.items():
+        seconds, matched = timed_load(directory, **filters)
+        report[name] = {'seconds': seconds, 'rows': matched}
+        print(f"{name:>20} {seconds:>8.3f} {matched:>8}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
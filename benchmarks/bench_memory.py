@@ -0,0 +1,153 @@
+"""Peak memory of large crawls against the local fixture site.
+
+Each scenario runs in a fresh child process, which reports its peak RSS
+(ru_maxrss) and the RSS right after importing dm_scraper, so the numbers
+are not skewed by earlier scenarios:
+
+- collect: crawl_pages over every page, holding all posts in one list
+- stream: a full archive run (crawl, diff, store, digests to the fake
+  Telegram API) into an empty store
+
+    python benchmarks/bench_memory.py [--pages 1200] [--output bench_memory.json]
+    python benchmarks/bench_memory.py --compare bench_memory.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SCENARIOS = ('collect', 'stream')
+CHAT_ID = "123456"
+
+
+def peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def run_scenario(scenario):
+    """Child process: run one scenario and print its numbers as JSON"""
+    import dm_scraper.telegram
+    from dm_scraper.archive import archive_pages
+    from dm_scraper.config import Config
+    from dm_scraper.crawl import crawl_pages
+    from dm_scraper.pipeline import Notifier, get_page_posts, run_pipeline, stories_url
+    from dm_scraper.store import SeenStore
+    from dm_scraper.telegram import TelegramSender
+
+    base_url = os.environ['BASE_URL']
+    last_page = int(os.environ['BENCH_PAGES'])
+    config = Config(dict(os.environ, INCREMENTAL='0', CRAWL_WORKERS='1'))
+    baseline = peak_rss_kb()
+
+    if scenario == 'collect':
+        posts = crawl_pages(lambda url: get_page_posts(url, base_url),
+                            lambda page: stories_url(base_url, page), config.start_page, 1, last_page)
+        result = {'posts': len(posts)}
+    else:
+        # The fake API does not rate limit; neither should the sender
+        dm_scraper.telegram.PRIVATE_CHAT_RATE = 1000.0
+        store = SeenStore(os.environ['STORE_FILE'], legacy_file=None)
+        summary = run_pipeline(archive_pages(config, store), store,
+                               Notifier(store, TelegramSender('BENCH'), CHAT_ID))
+        store.close()
+        result = {'posts': summary['posts'], 'messages': summary['sent']}
+
+    result.update({'import_rss_kb': baseline, 'peak_rss_kb': peak_rss_kb()})
+    print(json.dumps(result))
+
+
+def measure(scenario, env):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', scenario],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=1200, help="listing pages on the fixture site")
+    parser.add_argument('--output', default='bench_memory.json', help="where to write the JSON results")
+    parser.add_argument('--compare', help="earlier results file to report changes against")
+    parser.add_argument('--child', choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_scenario(args.child)
+        return 0
+
+    from benchmarks.fake_telegram import start_fake_telegram
+    from benchmarks.fixture_server import start_fixture_site
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    site = start_fixture_site(last_page=args.pages)
+    telegram_server = start_fake_telegram(per_chat_rate=0)
+    workdir = tempfile.mkdtemp(prefix='dm_bench_memory_')
+    env = dict(
+        os.environ,
+        BASE_URL=site.url,
+        BENCH_PAGES=str(args.pages),
+        TELEGRAM_API_URL=telegram_server.url,
+        TELEGRAM_TOKEN='BENCH',
+        CHAT_ID=CHAT_ID,
+        SESSION_FILE=os.path.join(workdir, 'cf_session.json'),
+        PAGE_CACHE_FILE=os.path.join(workdir, 'page_cache.json'),
+        METRICS_FILE='',
+        METRICS_TEXTFILE='',
+        CRAWL_DELAY='0',
+        VERBOSE='0',
+    )
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pages': args.pages,
+        'results': {}
+    }
+    print(f"{'scenario':<10} {'posts':>8} {'import MiB':>11} {'peak MiB':>9} {'growth MiB':>11} {'vs baseline':>12}")
+    for scenario in SCENARIOS:
+        env['STORE_FILE'] = os.path.join(workdir, f'{scenario}.db')
+        result = measure(scenario, env)
+        report['results'][scenario] = result
+        growth = result['peak_rss_kb'] - result['import_rss_kb']
+        compared = ""
+        old = (baseline or {}).get('results', {}).get(scenario)
+        if old:
+            old_growth = old['peak_rss_kb'] - old['import_rss_kb']
+            compared = f"{(growth - old_growth) / 1024:+.1f} MiB"
+        print(f"{scenario:<10} {result['posts']:>8} {result['import_rss_kb'] / 1024:>11.1f} "
+              f"{result['peak_rss_kb'] / 1024:>9.1f} {growth / 1024:>11.1f} {compared:>12}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""Compare the listing page parser backends on the saved fixtures.
+
+Checks that every backend extracts exactly what the BeautifulSoup reference
+does, then reports the time per page and the speedup over the reference.
+
+    python benchmarks/bench_parse.py [--iterations 200]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dm_scraper.parse import BACKENDS  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+BASE_URL = "https://deshimula.com/"
+
+
+def load_fixtures():
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, 'stories_*.html'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+
+def time_backend(extract, pages, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for html in pages.values():
+            extract(html, BASE_URL)
+    return (time.perf_counter() - started) / (iterations * len(pages))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    pages = load_fixtures()
+    reference = {name: BACKENDS['bs4'](html, BASE_URL) for name, html in pages.items()}
+
+    print(f"{len(pages)} fixture pages, {args.iterations} iterations")
+    print(f"{'backend':<10} {'identical':<10} {'ms/page':>10} {'speedup':>8}")
+
+    ok = True
+    baseline = None
+    for name, extract in BACKENDS.items():
+        identical = all(extract(html, BASE_URL) == reference[page] for page, html in pages.items())
+        ok = ok and identical
+        per_page = time_backend(extract, pages, args.iterations)
+        if baseline is None:
+            baseline = per_page
+        print(f"{name:<10} {'yes' if identical else 'NO':<10} {per_page * 1000:>10.3f} {baseline / per_page:>7.1f}x")
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
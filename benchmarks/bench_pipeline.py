@@ -0,0 +1,209 @@
+"""End-to-end pipeline timings against local stand-ins for the site and Telegram.
+
+Starts the fixture site and the fake Telegram API, points dm_scraper at
+them through BASE_URL and TELEGRAM_API_URL, and for each site size times:
+
+- get_page_posts over every page, cold and again from the page cache
+- the archive crawl (pages 2..N), sequential and with 4 workers
+- find_new_posts with the older half of the posts already stored
+- the Notifier: digests for every new post, and one message per post for
+  a normal monitor batch of new posts
+- a full streaming archive run into an empty store, including how long
+  the first alert took to arrive
+
+Nothing touches the network or the real state files. Results are written as
+JSON so runs can be compared across commits:
+
+    python benchmarks/bench_pipeline.py [--sizes 5,100,1000] [--output bench_pipeline.json]
+    python benchmarks/bench_pipeline.py --sizes 5,100 --compare bench_pipeline.json
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_telegram import start_fake_telegram  # noqa: E402
+from benchmarks.fixture_server import start_fixture_site  # noqa: E402
+
+CHAT_ID = "123456"
+MONITOR_BATCH = 10  # new posts in a typical monitor run (below the digest threshold)
+
+
+def timed(func, quiet=True):
+    """Run func, returning (seconds, result); dm_scraper's logging is discarded"""
+    with open(os.devnull, 'w') as devnull, contextlib.ExitStack() as stack:
+        if quiet:
+            stack.enter_context(contextlib.redirect_stdout(devnull))
+        started = time.perf_counter()
+        result = func()
+        return time.perf_counter() - started, result
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_size(size, site, telegram_server, workdir):
+    from dm_scraper.archive import archive_pages
+    from dm_scraper.cache import page_cache
+    from dm_scraper.config import Config
+    from dm_scraper.pipeline import Notifier, find_new_posts, get_page_posts, page_url, run_pipeline
+    from dm_scraper.store import SeenStore
+    from dm_scraper.telegram import TelegramSender
+
+    site.last_page = size
+    sender = TelegramSender('BENCH')
+    results = {}
+
+    def reset_page_cache():
+        page_cache.entries = None
+
+    reset_page_cache()
+    urls = [page_url(site.url, page) for page in range(1, size + 1)]
+    seconds, pages = timed(lambda: [get_page_posts(url, site.url) for url in urls])
+    results['get_page_posts'] = {'seconds': seconds, 'pages': size, 'posts': sum(map(len, pages))}
+    seconds, _ = timed(lambda: [get_page_posts(url, site.url) for url in urls])
+    results['get_page_posts_cached'] = {'seconds': seconds, 'pages': size}
+
+    all_posts = []
+    for workers in (1, 4):
+        reset_page_cache()
+        config = Config(dict(os.environ, INCREMENTAL='0', CRAWL_WORKERS=str(workers)))
+        seconds, crawled = timed(lambda: list(archive_pages(config, None)))
+        all_posts = [post for _, posts in crawled for post in posts]
+        results[f'archive_crawl_w{workers}'] = {'seconds': seconds, 'pages': size - 1, 'posts': len(all_posts)}
+
+    # The older half of the site is already known, as after an earlier run
+    store = SeenStore(os.path.join(workdir, f'allpost_{size}.db'), legacy_file=None)
+    store.add_posts(all_posts[len(all_posts) // 2:])
+    seconds, new_posts = timed(lambda: find_new_posts(all_posts, store))
+    results['find_new_posts'] = {'seconds': seconds, 'posts': len(all_posts), 'new': len(new_posts)}
+
+    def notify(store, posts, threshold):
+        notifier = Notifier(store, sender, CHAT_ID, threshold=threshold)
+        notifier.add(posts, posts)
+        return notifier.close()
+
+    telegram_server.reset()
+    seconds, sent = timed(lambda: notify(store, new_posts, 0))
+    results['notify_digest'] = {'seconds': seconds, 'posts': len(new_posts), 'messages': sent}
+    store.close()
+
+    batch = new_posts[:MONITOR_BATCH]
+    store = SeenStore(os.path.join(workdir, f'monitor_{size}.db'), legacy_file=None)
+    telegram_server.reset()
+    seconds, sent = timed(lambda: notify(store, batch, MONITOR_BATCH))
+    results['notify_individual'] = {'seconds': seconds, 'posts': len(batch), 'messages': sent}
+    store.close()
+
+    # Everything at once: crawl, diff and digests streaming out together
+    reset_page_cache()
+    store = SeenStore(os.path.join(workdir, f'stream_{size}.db'), legacy_file=None)
+    config = Config(dict(os.environ, INCREMENTAL='0', CRAWL_WORKERS='4'))
+    telegram_server.reset()
+    started = time.monotonic()
+    seconds, summary = timed(lambda: run_pipeline(
+        archive_pages(config, store), store, Notifier(store, sender, CHAT_ID)
+    ))
+    results['stream_archive'] = {'seconds': seconds, 'pages': summary['pages'], 'messages': summary['sent']}
+    if telegram_server.first_message_at is not None:
+        results['first_alert'] = {'seconds': telegram_server.first_message_at - started}
+    store.close()
+    return results
+
+
+def per_unit(result):
+    for unit in ('pages', 'messages', 'posts'):
+        if result.get(unit):
+            return result['seconds'] / result[unit] * 1000, unit[:-1]
+    return None, None
+
+
+def print_results(report, baseline=None):
+    print(f"{'size':>6} {'metric':<22} {'seconds':>9} {'ms/unit':>14} {'vs baseline':>12}")
+    for size, results in report['results'].items():
+        for metric, result in results.items():
+            ms, unit = per_unit(result)
+            per = f"{ms:.2f}/{unit}" if ms is not None else ""
+            compared = ""
+            old = (baseline or {}).get('results', {}).get(size, {}).get(metric)
+            if old and result['seconds'] > 0:
+                compared = f"{old['seconds'] / result['seconds']:.2f}x"
+            print(f"{size:>6} {metric:<22} {result['seconds']:>9.3f} {per:>14} {compared:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='5,100,1000', help="comma-separated page counts")
+    parser.add_argument('--output', default='bench_pipeline.json', help="where to write the JSON results")
+    parser.add_argument('--compare', help="earlier results file to report speedups against")
+    parser.add_argument('--telegram-rate', type=float, default=20.0,
+                        help="messages/sec per chat allowed by the fake API and the sender (Telegram: 1)")
+    parser.add_argument('--fail-every', type=int, default=0, help="inject a 429 every N sendMessage calls")
+    parser.add_argument('--retry-after', type=int, default=1, help="retry_after sent with injected 429s")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    site = start_fixture_site(last_page=max(sizes))
+    telegram_server = start_fake_telegram(
+        per_chat_rate=args.telegram_rate, fail_every=args.fail_every, retry_after=args.retry_after
+    )
+    workdir = tempfile.mkdtemp(prefix='dm_bench_')
+
+    # Must be set before dm_scraper reads its configuration
+    os.environ.update({
+        'BASE_URL': site.url,
+        'TELEGRAM_API_URL': telegram_server.url,
+        'TELEGRAM_TOKEN': 'BENCH',
+        'CHAT_ID': CHAT_ID,
+        'STORE_FILE': os.path.join(workdir, 'seen_posts.db'),
+        'SESSION_FILE': os.path.join(workdir, 'cf_session.json'),
+        'PAGE_CACHE_FILE': os.path.join(workdir, 'page_cache.json'),
+        'PAGE_CACHE_MAX_ENTRIES': str(max(sizes) + 10),
+        'CRAWL_DELAY': '0',
+    })
+    import dm_scraper.telegram
+    dm_scraper.telegram.PRIVATE_CHAT_RATE = args.telegram_rate
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'telegram_rate': args.telegram_rate,
+        'fail_every': args.fail_every,
+        'results': {}
+    }
+    for size in sizes:
+        print(f"⏱️ {size} pages...", flush=True)
+        report['results'][str(size)] = run_size(size, site, telegram_server, workdir)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    print_results(report, baseline)
+    print(f"💾 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""Membership checks against large histories: Python set vs SQLite vs seen index.
+
+For each history size, fills a store with synthetic posts and times:
+
+- set: the old approach, rebuilding a set of "title_link" strings from the
+  saved posts on every run (build time and memory)
+- sqlite: SeenStore.fingerprints() as diff_posts calls it, a page of
+  posts at a time
+- index: the same with SEEN_INDEX_FILE - build time, file size, time to
+  map an existing index (and to open the store with it), lookups, and the
+  measured false-positive rate of the Bloom filter on its own
+
+Lookups are half known and half new posts, in pages of 12.
+
+    python benchmarks/bench_seen.py [--sizes 10000,100000,1000000] [--output bench_seen.json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PAGE_SIZE = 12
+LOOKUPS = 24000
+FALSE_POSITIVE_PROBES = 200000
+FILL_BATCH = 10000
+
+
+def synthetic_post(number):
+    return {
+        'title': f"Review {number} of a synthetic company",
+        'link': f"https://deshimula.com/story/{number}/review-{number}",
+        'company': f"Company {number % 500}",
+        'role': "Software Engineer",
+        'badges': ["Good"],
+    }
+
+
+def fill_store(store, size):
+    for start in range(0, size, FILL_BATCH):
+        store.add_posts([synthetic_post(n) for n in range(start, min(size, start + FILL_BATCH))])
+
+
+def time_lookups(store, post_ids):
+    started = time.perf_counter()
+    found = 0
+    for start in range(0, len(post_ids), PAGE_SIZE):
+        found += len(store.fingerprints(post_ids[start:start + PAGE_SIZE]))
+    return time.perf_counter() - started, found
+
+
+def run_size(size, workdir):
+    from dm_scraper.seenindex import SEEN_INDEX_FP_RATE, SeenIndex, id_hash
+    from dm_scraper.store import SeenStore
+
+    results = {}
+    # The old seen_posts.json approach: a set of title_link strings rebuilt every run
+    saved = [synthetic_post(n) for n in range(size)]
+    tracemalloc.start()
+    started = time.perf_counter()
+    seen = {f"{post['title']}_{post['link']}" for post in saved}
+    results['set'] = {'build_seconds': time.perf_counter() - started,
+                      'memory_mib': tracemalloc.get_traced_memory()[0] / 2 ** 20}
+    tracemalloc.stop()
+    del seen, saved
+
+    db_path = os.path.join(workdir, f'seen-{size}.db')
+    index_path = os.path.join(workdir, f'seen-{size}.idx')
+    store = SeenStore(db_path, legacy_file=None)
+    started = time.perf_counter()
+    fill_store(store, size)
+    fill_seconds = time.perf_counter() - started
+    store.close()
+
+    # Half the lookups hit stored posts, half are new
+    half = LOOKUPS // 2
+    post_ids = [str(n * size // half) for n in range(half)] + [str(size + n) for n in range(half)]
+
+    store = SeenStore(db_path, legacy_file=None)
+    seconds, found = time_lookups(store, post_ids)
+    results['sqlite'] = {'fill_seconds': fill_seconds, 'lookup_us': seconds / LOOKUPS * 1e6, 'found': found}
+    store.close()
+
+    started = time.perf_counter()
+    store = SeenStore(db_path, legacy_file=None, index_file=index_path)
+    build_seconds = time.perf_counter() - started
+    store.close()
+
+    started = time.perf_counter()
+    index = SeenIndex(index_path)
+    map_seconds = time.perf_counter() - started
+    unknown = (id_hash(str(size * 10 + n)) for n in range(FALSE_POSITIVE_PROBES))
+    false_positives = sum(1 for key in unknown if index.in_filter(key))
+    index.close()
+
+    started = time.perf_counter()
+    store = SeenStore(db_path, legacy_file=None, index_file=index_path)
+    open_seconds = time.perf_counter() - started
+    seconds, found = time_lookups(store, post_ids)
+    results['index'] = {
+        'build_seconds': build_seconds,
+        'map_ms': map_seconds * 1000,
+        'store_open_ms': open_seconds * 1000,
+        'file_mib': os.path.getsize(index_path) / 2 ** 20,
+        'lookup_us': seconds / LOOKUPS * 1e6,
+        'found': found,
+        'false_positive_rate': false_positives / FALSE_POSITIVE_PROBES,
+        'target_rate': SEEN_INDEX_FP_RATE,
+    }
+    store.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000,1000000', help="comma-separated history sizes")
+    parser.add_argument('--output', default='bench_seen.json', help="where to write the JSON results")
+    args = parser.parse_args()
+
+    os.environ['VERBOSE'] = '0'
+    workdir = tempfile.mkdtemp(prefix='dm_bench_seen_')
+    report = {}
+    print(f"{'posts':>8} {'set build':>10} {'set MiB':>8} {'sqlite us':>10} {'idx build':>10} "
+          f"{'idx map':>8} {'store open':>11} {'idx MiB':>8} {'idx us':>7} {'FP rate':>8}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        result = run_size(size, workdir)
+        report[size] = result
+        s, q, i = result['set'], result['sqlite'], result['index']
+        print(f"{size:>8} {s['build_seconds']:>9.3f}s {s['memory_mib']:>8.1f} {q['lookup_us']:>10.1f} "
+              f"{i['build_seconds']:>9.2f}s {i['map_ms']:>6.2f}ms {i['store_open_ms']:>9.1f}ms "
+              f"{i['file_mib']:>8.2f} {i['lookup_us']:>7.1f} "
+              f"{i['false_positive_rate']:>8.2%}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""Sharded crawl with several worker processes against the local fixture site.
+
+For each worker count, starts that many `python -m dm_scraper.shard work`
+processes on a fresh shard board and times them until every shard is done.
+With --kill, one extra worker is killed (SIGKILL) as soon as it holds a
+lease, so its shard has to expire and be reclaimed by the others.
+
+The saved pages are then merged with iter_sharded_pages() and compared with
+a plain sequential crawl: every page must come back once, in website
+order, with the same posts.
+
+    python benchmarks/bench_shard.py [--pages 200] [--workers 1,4] [--delay 0.01] [--kill]
+"""
+import argparse
+import contextlib
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fixture_server import start_fixture_site  # noqa: E402
+
+LEASE = 2.0  # short, so a killed worker's shard comes back quickly
+
+
+def start_worker(env):
+    return subprocess.Popen([sys.executable, '-m', 'dm_scraper.shard', 'work'], cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def kill_once_leased(board, crawl, worker):
+    """SIGKILL a worker as soon as it holds a shard; returns the shard's first page"""
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        with board._lock:
+            row = board.conn.execute(
+                "SELECT first_page FROM shards WHERE crawl = ? AND status = 'leased' AND worker LIKE ?",
+                (crawl, f"%:{worker.pid}")
+            ).fetchone()
+        if row:
+            worker.send_signal(signal.SIGKILL)
+            worker.wait()
+            return row[0]
+        time.sleep(0.01)
+    return None
+
+
+def run(workers, args, site, workdir):
+    from dm_scraper.archive import crawl_name
+    from dm_scraper.config import Config
+    from dm_scraper.pipeline import get_page_posts, stories_url
+    from dm_scraper.shard import ShardBoard, iter_sharded_pages
+
+    board_file = os.path.join(workdir, f'shards-{workers}.db')
+    env = dict(
+        os.environ,
+        PYTHONPATH=ROOT,
+        BASE_URL=site.url,
+        SHARD_DB=board_file,
+        SHARD_SIZE=str(args.shard_size),
+        SHARD_LEASE=str(LEASE),
+        SHARD_POLL='0.2',
+        CRAWL_DELAY=str(args.delay),
+        SESSION_FILE=os.path.join(workdir, 'cf_session.json'),
+        PAGE_CACHE_FILE=os.path.join(workdir, 'page_cache.json'),
+        INCREMENTAL='0',
+        VERBOSE='0',
+    )
+    config = Config(env)
+    crawl = crawl_name(config)
+    board = ShardBoard(board_file, LEASE)
+
+    started = time.perf_counter()
+    procs = [start_worker(env) for _ in range(workers)]
+    killed_shard = kill_once_leased(board, crawl, start_worker(env)) if args.kill else None
+    for proc in procs:
+        proc.wait()
+    seconds = time.perf_counter() - started
+
+    with board._lock:
+        reclaimed = board.conn.execute(
+            "SELECT COUNT(*) FROM shards WHERE crawl = ? AND attempts > 1", (crawl,)
+        ).fetchone()[0]
+
+    def get_posts(url):
+        return get_page_posts(url, site.url)
+
+    def url(page):
+        return stories_url(site.url, page)
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        merged = list(iter_sharded_pages(board, crawl, get_posts, url, config.start_page))
+        expected = [(page, get_posts(url(page))) for page in range(config.start_page, args.pages + 1)]
+    board.close()
+    return {
+        'workers': workers,
+        'seconds': seconds,
+        'pages': len(merged),
+        'posts': sum(len(posts) for _, posts in merged),
+        'killed_shard': killed_shard,
+        'reclaimed_shards': reclaimed,
+        'in_order': merged == expected,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=200, help="listing pages on the fixture site")
+    parser.add_argument('--workers', default='1,4', help="comma-separated worker process counts")
+    parser.add_argument('--shard-size', type=int, default=10, help="pages per shard")
+    parser.add_argument('--delay', type=float, default=0.01, help="CRAWL_DELAY for each worker")
+    parser.add_argument('--kill', action='store_true', help="kill one extra worker while it holds a lease")
+    parser.add_argument('--output', help="where to write the JSON results")
+    args = parser.parse_args()
+
+    site = start_fixture_site(last_page=args.pages)
+    workdir = tempfile.mkdtemp(prefix='dm_bench_shard_')
+    results = []
+    print(f"{'workers':>7} {'seconds':>8} {'pages':>6} {'posts':>6} {'killed':>7} {'reclaimed':>9} {'in order':>9}")
+    for workers in (int(n) for n in args.workers.split(',')):
+        result = run(workers, args, site, workdir)
+        results.append(result)
+        killed = result['killed_shard'] if result['killed_shard'] is not None else "-"
+        print(f"{workers:>7} {result['seconds']:>8.2f} {result['pages']:>6} {result['posts']:>6} "
+              f"{killed:>7} {result['reclaimed_shards']:>9} {str(result['in_order']):>9}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'pages': args.pages, 'results': results}, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+    return 0 if all(result['in_order'] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""End-to-end time to deliver N messages to a local fake Telegram endpoint.
+
+Compares the rate-aware TelegramSender with the old loop (send, then
+time.sleep(3)). The old loop is only run with --legacy because it takes
+3 seconds per message; otherwise its sleep-only lower bound is printed.
+
+    python benchmarks/bench_telegram.py [-n 30] [--fail-every 10] [--legacy]
+"""
+import argparse
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_telegram import start_fake_telegram  # noqa: E402
+from dm_scraper.telegram import TelegramSender  # noqa: E402
+
+CHAT_ID = "123456"
+
+
+def run_sender(url, count):
+    sender = TelegramSender("TEST", api_url=url)
+    started = time.perf_counter()
+    for i in range(count):
+        sender.send(CHAT_ID, f"message {i}")
+    return time.perf_counter() - started, sender
+
+
+def run_legacy(url, count):
+    started = time.perf_counter()
+    for i in range(count):
+        requests.post(f"{url}/botTEST/sendMessage", data={'chat_id': CHAT_ID, 'text': f"message {i}"}, timeout=30)
+        time.sleep(3)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--messages', type=int, default=30)
+    parser.add_argument('--fail-every', type=int, default=0, help="inject a 429 every N requests")
+    parser.add_argument('--legacy', action='store_true', help="also time the old sleep(3) loop")
+    args = parser.parse_args()
+
+    server = start_fake_telegram(fail_every=args.fail_every)
+    elapsed, sender = run_sender(server.url, args.messages)
+    delivered = [m['text'] for m in server.messages]
+    in_order = delivered == [f"message {i}" for i in range(args.messages)]
+
+    print(f"TelegramSender: {args.messages} messages in {elapsed:.1f}s "
+          f"({args.messages / elapsed:.2f} msg/s), {sender.rate_limited} 429s, in order: {'yes' if in_order else 'NO'}")
+
+    if args.legacy:
+        server.messages.clear()
+        legacy = run_legacy(server.url, args.messages)
+        print(f"sleep(3) loop:  {args.messages} messages in {legacy:.1f}s")
+    else:
+        print(f"sleep(3) loop:  at least {args.messages * 3:.0f}s (sleeps alone; run with --legacy to measure)")
+
+    server.shutdown()
+    return 0 if in_order else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""Local stand-in for the Telegram Bot API sendMessage endpoint.
+
+Accepts POST /bot<token>/sendMessage, records every delivered message in
+order and answers 429 with retry_after when a chat sends faster than
+per_chat_rate, like the real API. fail_every=N also rejects every Nth
+request with a 429 to exercise the retry path.
+
+    python benchmarks/fake_telegram.py --port 8081
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class FakeTelegram(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, per_chat_rate=1.0, fail_every=0, retry_after=1):
+        super().__init__(address, FakeTelegramHandler)
+        self.min_interval = 1.0 / per_chat_rate if per_chat_rate else 0.0
+        self.fail_every = fail_every
+        self.retry_after = retry_after
+        self.messages = []
+        self.first_message_at = None  # time.monotonic() of the first delivery since reset()
+        self.requests = 0
+        self.rejected = 0
+        self.last_sent = {}
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reset(self):
+        with self.lock:
+            self.messages.clear()
+            self.first_message_at = None
+
+
+class FakeTelegramHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle plus
+    # delayed ACKs add ~40 ms to every keep-alive request
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+        if not self.path.endswith('/sendMessage'):
+            self._reply(404, {'ok': False, 'description': 'Not Found'})
+            return
+
+        server = self.server
+        chat_id = form.get('chat_id')
+        with server.lock:
+            server.requests += 1
+            now = time.monotonic()
+            too_fast = now - server.last_sent.get(chat_id, -1e9) < server.min_interval * 0.95
+            injected = server.fail_every and server.requests % server.fail_every == 0
+            if too_fast or injected:
+                server.rejected += 1
+            else:
+                server.last_sent[chat_id] = now
+                server.messages.append(form)
+                if server.first_message_at is None:
+                    server.first_message_at = now
+
+        if too_fast or injected:
+            self._reply(429, {
+                'ok': False,
+                'error_code': 429,
+                'description': f"Too Many Requests: retry after {server.retry_after}",
+                'parameters': {'retry_after': server.retry_after}
+            })
+        else:
+            self._reply(200, {'ok': True, 'result': {'message_id': len(server.messages)}})
+
+
+def start_fake_telegram(port=0, **options):
+    """Start a FakeTelegram server on a background thread and return it"""
+    server = FakeTelegram(('127.0.0.1', port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Telegram sendMessage endpoint")
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--per-chat-rate', type=float, default=1.0)
+    parser.add_argument('--fail-every', type=int, default=0)
+    args = parser.parse_args()
+    server = FakeTelegram(('127.0.0.1', args.port), args.per_chat_rate, args.fail_every)
+    print(f"Fake Telegram listening on {server.url}")
+    server.serve_forever()
@@ -0,0 +1,110 @@
+"""Local stand-in for deshimula.com built from the recorded fixtures.
+
+Serves / and /stories/N for N up to last_page from stories_page.html, with
+the story IDs renumbered per page so every post on the site is unique and
+newer pages hold higher IDs, like the real listing. Pages past the end get
+stories_empty.html and /story/... detail pages get post_detail.html.
+block_every=N answers every Nth request with a 403 Cloudflare challenge.
+
+    python benchmarks/fixture_server.py --port 8080 --pages 100 [--block-every 10]
+"""
+import argparse
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+STORY_LINK_RE = re.compile(r'/story/(\d+)')
+CHALLENGE = b"<html><head><title>Just a moment...</title></head><body>Checking your browser</body></html>"
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+class FixtureSite(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, last_page=5, block_every=0):
+        super().__init__(address, FixtureSiteHandler)
+        self.last_page = last_page
+        self.block_every = block_every
+        self.blocked = 0
+        self.listing = read_fixture('stories_page.html')
+        self.empty = read_fixture('stories_empty.html').encode('utf-8')
+        self.detail = read_fixture('post_detail.html').encode('utf-8')
+        self.lowest_id = min(int(m) for m in STORY_LINK_RE.findall(self.listing))
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def render_page(self, page):
+        if page > self.last_page:
+            return self.empty
+        offset = (self.last_page - page) * 100 - self.lowest_id + 1
+        return STORY_LINK_RE.sub(
+            lambda m: f"/story/{int(m.group(1)) + offset}",
+            self.listing
+        ).encode('utf-8')
+
+
+class FixtureSiteHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle plus
+    # delayed ACKs add ~40 ms to every keep-alive request
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            block = server.block_every and server.requests % server.block_every == 0
+            if block:
+                server.blocked += 1
+        if block:
+            self._reply(403, CHALLENGE)
+            return
+
+        path = self.path.split('?')[0].strip('/')
+        if path == '':
+            self._reply(200, server.render_page(1))
+        elif path.startswith('stories/') and path[8:].isdigit():
+            self._reply(200, server.render_page(int(path[8:])))
+        elif path.startswith('story/'):
+            self._reply(200, server.detail)
+        else:
+            self._reply(404, b"Not Found")
+
+
+def start_fixture_site(port=0, last_page=5, block_every=0):
+    """Start a FixtureSite on a background thread and return it"""
+    server = FixtureSite(('127.0.0.1', port), last_page, block_every)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the DeshiMula fixtures locally")
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--pages', type=int, default=5, help="number of listing pages")
+    parser.add_argument('--block-every', type=int, default=0, help="answer every Nth request with a 403 challenge")
+    args = parser.parse_args()
+    server = FixtureSite(('127.0.0.1', args.port), args.pages, args.block_every)
+    print(f"Fixture site with {args.pages} pages listening on {server.url}")
+    server.serve_forever()
@@ -0,0 +1 @@
+"""Shared helpers for the DeshiMula monitor scripts"""
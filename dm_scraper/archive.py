@@ -0,0 +1,185 @@
+"""Full archive crawl behind allpost.py: every page from page 2 to the end.
+
+A full (non-incremental) crawl checkpoints each page once its posts are
+recorded. If the run is cut short - the Actions time limit, a Cloudflare
+wall - the next run with the same START_PAGE/END_PAGE continues after the
+last checkpoint instead of starting again from page 2. The checkpoints are
+cleared when a crawl reaches its end page or the end of the site, and kept
+when it stopped at a page that could not be fetched.
+
+With SHARD_DB set the crawl is split between processes through a shared
+shard board (see dm_scraper.shard): run_archive() crawls shards itself and
+reads every page back in order for the diff, while any number of
+`python -m dm_scraper.shard work` processes take the other shards.
+"""
+import re
+from itertools import islice
+
+from .cache import page_cache
+from .crawl import find_last_page, iter_crawl_pages, iter_pages, iter_until_known
+from .fetch import FetchError, fetch, log_fetch_stats, save_session
+from .history import HistoryWriter
+from .metrics import write_report
+from .pipeline import Notifier, get_page_posts, run_pipeline, stories_url
+from .shard import ShardBoard, iter_sharded_pages, work, worker_id
+from .store import SeenStore
+from .subscribers import load_subscribers
+from .telegram import TelegramSender, drain_outbox
+from .util import log
+
+POST_CONTAINER_RE = re.compile(r'class=["\']container mt-5["\']')
+
+
+def page_has_posts(base_url, page):
+    """Cheap check for post containers, without building a parse tree"""
+    response = fetch(stories_url(base_url, page))
+    return response.status_code == 200 and POST_CONTAINER_RE.search(response.text) is not None
+
+
+def crawl_name(config):
+    """Checkpoint key: runs over the same page range share their progress"""
+    return f"archive:{config.start_page}-{config.end_page or 'end'}"
+
+
+def plan_shards(config, board, crawl, start_page=None):
+    """Cut the crawl into shards, unless another worker got there first"""
+    if board.is_planned(crawl):
+        return
+    start_page = config.start_page if start_page is None else start_page
+    last_page = config.end_page
+    if last_page is None:
+        last_page = find_last_page(lambda page: page_has_posts(config.base_url, page), start_page)
+    board.plan(crawl, start_page, last_page)
+
+
+def run_shard_worker(config):
+    """Crawl shards of the current archive crawl until none is left"""
+    board = ShardBoard(config.shard_db)
+    crawl = crawl_name(config)
+    worker = worker_id()
+    try:
+        plan_shards(config, board, crawl)
+        log(f"🧩 Shard worker {worker} joining {crawl}")
+        shards = work(board, crawl, lambda url: get_page_posts(url, config.base_url),
+                      lambda page: stories_url(config.base_url, page), worker)
+        log(f"🧩 {worker} crawled {shards} shards of {crawl}")
+    except FetchError as e:
+        log(f"⛔ Shard worker {worker} stopping: {e}")
+    board.close()
+    log_fetch_stats()
+    save_session()
+
+
+def archive_pages(config, store, start_page=None, board=None):
+    """Crawler for the archive: incremental, sharded, concurrent or sequential per config"""
+    start_page = config.start_page if start_page is None else start_page
+
+    def get_posts(url):
+        return get_page_posts(url, config.base_url)
+
+    def url(page):
+        return stories_url(config.base_url, page)
+
+    if board is not None:
+        def sharded_pages():
+            # Planning fetches pages too, so it runs inside the pipeline's FetchError handling
+            crawl = crawl_name(config)
+            plan_shards(config, board, crawl, start_page)
+            log(f"🧩 Sharded crawl through {config.shard_db}")
+            yield from iter_sharded_pages(board, crawl, get_posts, url, start_page)
+        return sharded_pages()
+
+    if config.incremental and store:
+        log("⚡ Incremental crawl - stopping at the first page with no new posts")
+        return iter_until_known(get_posts, url, start_page, store, store.get_high_water(),
+                                deep_pages=config.end_page)
+
+    if config.crawl_workers > 1:
+        def concurrent_pages():
+            log(f"⚡ Concurrent crawl with {config.crawl_workers} workers")
+            last_page = config.end_page
+            if last_page is None:
+                last_page = find_last_page(lambda page: page_has_posts(config.base_url, page), start_page)
+            yield from iter_crawl_pages(get_posts, url, start_page, config.crawl_workers, last_page)
+        return concurrent_pages()
+
+    # Each page is fetched and parsed once; the first empty page ends the crawl
+    pages = iter_pages(get_posts, url, start_page)
+    if config.end_page is not None:
+        pages = islice(pages, max(0, config.end_page - start_page + 1))
+    return pages
+
+
+def run_archive(config):
+    log("🔍 DeshiMula All Posts Monitor Started (Starting from Page 2)")
+    store = SeenStore()
+    sender = TelegramSender(config.telegram_token)
+    log(f"📋 Loaded {len(store)} existing posts from store")
+
+    # Finish what an interrupted run left behind before scraping again
+    pending = store.pending_count()
+    if pending:
+        log(f"📬 Resuming {pending} queued notifications from a previous run")
+        drain_outbox(store, sender)
+
+    # After the store was rebuilt from a corrupt file every post would look
+    # new, so that crawl is only recorded
+    reseed = store.needs_reseed()
+    if reseed:
+        log("🩹 Store was rebuilt - recording current posts without notifications")
+
+    checkpoint = None
+    board = None
+    start_page = config.start_page
+    if config.shard_db and config.incremental:
+        log("⚠️ SHARD_DB ignored - sharding needs a full crawl (INCREMENTAL=0)")
+    elif config.shard_db:
+        board = ShardBoard(config.shard_db)
+    if not config.incremental:
+        crawl = crawl_name(config)
+        cursor = store.crawl_cursor(crawl)
+        if board and not config.resume:
+            # Start shard workers after this point, or they join the discarded crawl
+            board.finish_crawl(crawl)
+        if cursor is not None and not config.resume:
+            log(f"🔁 RESUME=0 - discarding the checkpoint at page {cursor}")
+            store.finish_crawl(crawl)
+        elif cursor is not None:
+            start_page = cursor + 1
+            log(f"⏯️ Resuming {crawl} after page {cursor}")
+
+        def checkpoint(page, posts):
+            store.complete_page(crawl, page, posts)
+
+    log(f"🌐 Scraping pages {start_page}-{config.end_page or 'end'}...")
+    subscribers = load_subscribers(config.chat_id, config.subscribers_file)
+    notifier = Notifier(store, sender, subscribers, 'HTML', fetch_details=config.fetch_details,
+                        edit_alerts=config.edit_alerts)
+    history = HistoryWriter(config.history_dir, store) if config.history_dir else None
+    summary = run_pipeline(archive_pages(config, store, start_page, board), store, notifier, reseed,
+                           checkpoint=checkpoint, history=history)
+    if checkpoint:
+        if summary['stopped']:
+            resume_from = (store.crawl_cursor(crawl) or config.start_page - 1) + 1
+            log(f"⏸️ Crawl stopped early ({summary['stopped']}) - {crawl} will resume from page {resume_from}")
+        else:
+            store.finish_crawl(crawl)
+            if board:
+                board.finish_crawl(crawl)
+            log(f"🏁 {crawl} complete - checkpoints cleared")
+    if board:
+        board.close()
+    log(f"📊 Found {summary['posts']} posts on {summary['pages']} pages, {summary['new']} new, "
+        f"{summary['updated']} edited, {summary['sent']} notifications sent")
+
+    log_fetch_stats()
+    save_session()
+    page_cache.log_stats()
+    page_cache.save()
+    sender.log_stats()
+
+    # Show final store statistics
+    log(f"📈 Seen store: {len(store)} posts")
+    store.close()
+    write_report("allpost")
+    log("✅ All posts scraping completed!")
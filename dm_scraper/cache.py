@@ -0,0 +1,125 @@
+"""On-disk cache of listing pages and the posts extracted from them.
+
+Each entry keeps the ETag/Last-Modified validators the site sent plus a
+hash of the body. A 304 or an identical body means the page has not
+changed, so the posts extracted last time are reused without parsing.
+Posts are kept as compact rows (see Post.to_row). Entries written by an
+older PAGE_CACHE_VERSION (e.g. with posts keyed by an older ID scheme) are
+dropped on load.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from .metrics import count
+from .parse import Post
+from .util import atomic_write, log
+
+PAGE_CACHE_FILE = os.getenv("PAGE_CACHE_FILE", "page_cache.json")
+PAGE_CACHE_MAX_ENTRIES = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "500"))
+PAGE_CACHE_VERSION = 3  # bump when the cached post dicts change shape
+
+
+def body_hash(content):
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+class PageCache:
+    """Least-recently-used cache of page validators and extracted posts"""
+
+    def __init__(self, path=PAGE_CACHE_FILE, max_entries=PAGE_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = None
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self.entries is not None:
+            return
+        self.entries = OrderedDict()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries.update(
+                    (url, entry) for url, entry in json.load(f).items()
+                    if entry.get('version') == PAGE_CACHE_VERSION
+                )
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, OSError, ValueError, AttributeError) as e:
+            log(f"⚠️ Ignoring unreadable page cache: {e}")
+
+    def conditional_headers(self, url):
+        """Return If-None-Match/If-Modified-Since headers for a cached URL"""
+        with self._lock:
+            self._load()
+            entry = self.entries.get(url)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def lookup(self, url, response):
+        """Return the cached posts if the response shows the page is unchanged"""
+        with self._lock:
+            self._load()
+            entry = self.entries.get(url)
+            if entry is not None:
+                if response.status_code == 304:
+                    self.not_modified += 1
+                    self.bytes_saved += entry.get('size', 0)
+                elif response.status_code != 200 or body_hash(response.content) != entry['hash']:
+                    entry = None
+            if entry is None:
+                self.misses += 1
+                count('page_cache_misses')
+                return None
+
+            self.hits += 1
+            count('page_cache_hits')
+            self.entries.move_to_end(url)
+            return [Post.from_row(row) for row in entry['posts']]
+
+    def store(self, url, response, posts):
+        """Remember the validators, body hash and extracted posts for a page"""
+        with self._lock:
+            self._load()
+            self.entries[url] = {
+                'version': PAGE_CACHE_VERSION,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'hash': body_hash(response.content),
+                'size': len(response.content),
+                'posts': [post.to_row() for post in posts]
+            }
+            self.entries.move_to_end(url)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def save(self):
+        if self.entries is None:
+            return
+        with self._lock:
+            try:
+                atomic_write(self.path, json.dumps(self.entries, ensure_ascii=False))
+            except OSError as e:
+                log(f"⚠️ Could not save page cache: {e}")
+
+    def log_stats(self):
+        total = self.hits + self.misses
+        if not total:
+            return
+        log(f"♻️ Page cache: {self.hits} hits, {self.misses} misses "
+            f"({self.hits / total:.0%} hit rate), {self.not_modified} not-modified responses, "
+            f"{self.bytes_saved / 1024:.1f} KiB not downloaded")
+
+
+page_cache = PageCache()
@@ -0,0 +1,60 @@
+"""Run settings, read from the environment when a run starts.
+
+Nothing is validated at import time, so the package and the scripts can be
+imported (by tests, benchmarks or another program) without TELEGRAM_TOKEN
+and CHAT_ID; require_telegram() checks them once a run is about to send.
+Lower-level settings with safe defaults (CRAWL_DELAY, STORE_FILE, ...) stay
+with the modules that use them.
+"""
+import os
+
+
+class ConfigError(ValueError):
+    pass
+
+
+class Config:
+    """Settings for one run; defaults maps variable names to per-script defaults"""
+
+    def __init__(self, environ=None, defaults=None):
+        env = os.environ if environ is None else environ
+        defaults = defaults or {}
+
+        def get(name, default):
+            return env.get(name) or defaults.get(name, default)
+
+        self.telegram_token = env.get("TELEGRAM_TOKEN")
+        self.chat_id = env.get("CHAT_ID")
+        self.subscribers_file = get("SUBSCRIBERS_FILE", "subscribers.json")  # Extra chats with filters
+        self.base_url = get("BASE_URL", "https://deshimula.com/")
+        self.max_pages = int(get("MAX_PAGES", "5"))  # Pages scanned by the monitor
+        self.incremental = get("INCREMENTAL", "1") == "1"  # Stop at the first page with no new posts
+        self.deep_scan_pages = int(get("DEEP_SCAN_PAGES", "20"))  # Page limit when the high-water post is gone
+        self.start_page = int(get("START_PAGE", "2"))  # First page of the archive crawl (page 1 is the monitor's)
+        end_page = get("END_PAGE", "")
+        self.end_page = int(end_page) if end_page else None  # Last page of the archive crawl (default: the end)
+        self.resume = get("RESUME", "1") == "1"  # Continue an interrupted archive crawl after its last checkpoint
+        self.crawl_workers = int(get("CRAWL_WORKERS", "1"))  # Pages fetched concurrently (1 = sequential)
+        self.shard_db = get("SHARD_DB", "")  # Shared shard board: split the archive crawl between processes
+        # Every crawled post, per crawl, for analysis (empty: off); set but empty overrides a script default
+        self.history_dir = env.get("HISTORY_DIR", defaults.get("HISTORY_DIR", ""))
+        self.fetch_details = get("FETCH_DETAILS", "1") == "1"  # Cache the review body of every new post
+        self.edit_alerts = get("EDIT_ALERTS", "0") == "1"  # Alert when a known post's title, company, role or badges change
+        self.daemon = get("DAEMON", "0") == "1"  # Keep running and poll instead of exiting after one check
+        self.poll_min_interval = int(get("POLL_MIN_INTERVAL", "120"))  # Seconds between polls while posts arrive
+        self.poll_max_interval = int(get("POLL_MAX_INTERVAL", "900"))  # Longest gap when quiet or blocked
+
+    def require_telegram(self):
+        """Raise ConfigError, with setup instructions, unless Telegram is configured.
+
+        CHAT_ID may be left out when a subscribers file names the chats.
+        """
+        if self.telegram_token and (self.chat_id or os.path.exists(self.subscribers_file)):
+            return
+        print("ERROR: Missing environment variables!")
+        print("Please create a .env file with:")
+        print("TELEGRAM_TOKEN=your_token_here")
+        print("CHAT_ID=your_chat_id_here")
+        print(f"Current TELEGRAM_TOKEN: {'SET' if self.telegram_token else 'NOT SET'}")
+        print(f"Current CHAT_ID: {'SET' if self.chat_id else 'NOT SET'}")
+        raise ConfigError("TELEGRAM_TOKEN and CHAT_ID must be set in environment variables")
@@ -0,0 +1,169 @@
+"""Page crawlers: sequential, concurrent with a bounded number of fetches in
+flight, and incremental (stop at the first page with nothing new).
+
+The iter_* generators yield (page, posts) as pages arrive, in page order, so
+callers can process a crawl one page at a time; the list versions collect
+everything.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .util import log
+
+
+def find_last_page(has_posts, start_page):
+    """Find the last page with posts in O(log N) calls to has_posts(page).
+
+    Doubles the step until it lands on an empty page, then binary searches
+    between the last non-empty and the first empty page. Returns
+    start_page - 1 if start_page itself is empty.
+    """
+    if not has_posts(start_page):
+        return start_page - 1
+
+    low = start_page
+    step = 1
+    high = start_page + step
+    while has_posts(high):
+        low = high
+        step *= 2
+        high = start_page + step
+
+    # low has posts, high does not
+    while high - low > 1:
+        middle = (low + high) // 2
+        if has_posts(middle):
+            low = middle
+        else:
+            high = middle
+
+    log(f"🔎 Last page with posts: {low}")
+    return low
+
+
+def iter_pages(get_posts, page_url, start_page, end_page=None, delay=0):
+    """Yield (page, posts) for consecutive pages, one fetch at a time.
+
+    Without end_page the first empty page ends the crawl. With one, every
+    page up to end_page is tried and empty ones are only reported.
+    """
+    page = start_page
+    while end_page is None or page <= end_page:
+        if delay and page > start_page:
+            time.sleep(delay)
+        posts = get_posts(page_url(page))
+        if not posts:
+            if end_page is None:
+                log(f"No more pages found after page {page - 1}")
+                return
+            log(f"⚠️ Page {page}: No posts found")
+        else:
+            log(f"✅ Page {page}: Found {len(posts)} posts", verbose=True)
+            yield page, posts
+        page += 1
+
+
+def iter_crawl_pages(get_posts, page_url, start_page, workers=4, last_page=None):
+    """Yield (page, posts) in page order from a pool of `workers` fetchers.
+
+    get_posts(url) is called for up to `workers` pages at a time. Pages are
+    submitted in order, and once a page comes back empty (or last_page is
+    reached) nothing beyond it is submitted. Each page is yielded as soon as
+    every page before it has been, so at most `workers` pages are held.
+    """
+    results = {}
+    end_page = last_page + 1 if last_page is not None else None
+    next_page = start_page
+    next_yield = start_page
+    in_flight = {}
+    fetched = 0
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            while len(in_flight) < workers and (end_page is None or next_page < end_page):
+                future = pool.submit(get_posts, page_url(next_page))
+                in_flight[future] = next_page
+                next_page += 1
+
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                page = in_flight.pop(future)
+                posts = future.result()
+                if posts:
+                    results[page] = posts
+                    log(f"✅ Page {page}: Found {len(posts)} posts", verbose=True)
+                elif end_page is None or page < end_page:
+                    end_page = page
+                    log(f"No more pages found after page {page - 1}")
+
+            # Pages fetched past the end while it was still unknown are dropped
+            while next_yield in results and (end_page is None or next_yield < end_page):
+                fetched += 1
+                yield next_yield, results.pop(next_yield)
+                next_yield += 1
+
+    elapsed = time.perf_counter() - started
+    rate = fetched / elapsed if elapsed > 0 else 0.0
+    log(f"⚡ Crawled {fetched} pages with {workers} workers in {elapsed:.1f}s ({rate:.2f} pages/sec)")
+
+
+def crawl_pages(get_posts, page_url, start_page, workers=4, last_page=None):
+    """Posts of every page before the first empty one, in website order"""
+    all_posts = []
+    for _, posts in iter_crawl_pages(get_posts, page_url, start_page, workers, last_page):
+        all_posts.extend(posts)
+    return all_posts
+
+
+def iter_until_known(get_posts, page_url, start_page, seen_ids, high_water_id=None,
+                     max_pages=None, deep_pages=None):
+    """Yield (page, posts) in order until a page contains nothing new.
+
+    Stops after the page holding high_water_id (the newest post processed
+    last run) or the first page whose posts are all in seen_ids. If neither
+    shows up within max_pages, the high-water post has moved or been
+    removed, so the scan keeps going up to deep_pages. A quiet run costs a
+    single request.
+    """
+    fetched = 0
+    total = 0
+    page = start_page
+    while deep_pages is None or page <= deep_pages:
+        page_posts = get_posts(page_url(page))
+        fetched += 1
+        if not page_posts:
+            log(f"No more pages found after page {page - 1}")
+            break
+
+        page_ids = [post['id'] for post in page_posts]
+        new_count = sum(1 for post_id in page_ids if post_id not in seen_ids)
+        log(f"📚 Page {page}: {len(page_posts)} posts, {new_count} new", verbose=True)
+        total += len(page_posts)
+        yield page, page_posts
+
+        if high_water_id is not None and high_water_id in page_ids:
+            log(f"🏁 Reached high-water post on page {page} - stopping")
+            break
+        if new_count == 0:
+            log(f"🏁 Page {page} has no new posts - stopping")
+            break
+
+        if max_pages is not None and page == max_pages:
+            log(f"🔍 High-water post not found in first {max_pages} pages - scanning deeper")
+        page += 1
+
+    log(f"📊 Incremental crawl fetched {fetched} pages, {total} posts")
+
+
+def crawl_until_known(get_posts, page_url, start_page, seen_ids, high_water_id=None,
+                      max_pages=None, deep_pages=None):
+    """Posts of every page iter_until_known visits, in website order"""
+    all_posts = []
+    for _, posts in iter_until_known(get_posts, page_url, start_page, seen_ids,
+                                     high_water_id, max_pages, deep_pages):
+        all_posts.extend(posts)
+    return all_posts
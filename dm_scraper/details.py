@@ -0,0 +1,65 @@
+"""Detail-page stage: fetch the company-review body of new posts.
+
+Pages are fetched on the shared session by a bounded worker pool, and every
+body is cached in the store keyed by post ID, so a review is only ever
+downloaded once.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .fetch import fetch
+from .metrics import count, timed
+from .parse import extract_review_body
+from .store import get_post_id
+from .util import log
+
+DETAIL_WORKERS = int(os.getenv("DETAIL_WORKERS", "4"))
+
+
+def fetch_post_content(link):
+    """Download a post's detail page and return its review text, or None"""
+    try:
+        response = fetch(link)
+        if response.status_code != 200:
+            log(f"⚠️ Detail page returned {response.status_code}: {link}")
+            return None
+        return extract_review_body(response.text)
+    except Exception as e:
+        log(f"Error fetching post content: {e}")
+        return None
+
+
+@timed("details")
+def fetch_post_contents(posts, store, workers=DETAIL_WORKERS):
+    """Return {post_id: review text} for posts, fetching only uncached ones"""
+    ids = {get_post_id(post): post for post in posts}
+    contents = store.get_contents(ids)
+    missing = [post for post_id, post in ids.items() if post_id not in contents]
+    hits = len(contents)
+
+    started = time.perf_counter()
+
+    def fetch_one(post):
+        content = fetch_post_content(post['link'])
+        if content:
+            store.save_content(get_post_id(post), content)
+        return get_post_id(post), content
+
+    fetched = 0
+    if missing:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for post_id, content in pool.map(fetch_one, missing):
+                if content:
+                    contents[post_id] = content
+                    fetched += 1
+
+    elapsed = time.perf_counter() - started
+    count('detail_cache_hits', hits)
+    count('detail_pages_fetched', len(missing))
+    total = len(ids)
+    hit_rate = hits / total if total else 0.0
+    rate = len(missing) / elapsed if missing and elapsed > 0 else 0.0
+    log(f"📖 Detail pages: {hits} cached, {len(missing)} fetched ({fetched} with content) "
+        f"at {rate:.2f} pages/sec, {hit_rate:.0%} cache hit rate")
+    return contents
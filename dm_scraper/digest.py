@@ -0,0 +1,168 @@
+"""Telegram message formatting: one alert per post, or digests.
+
+Digests are used when a run finds more than DIGEST_THRESHOLD new posts, e.g.
+after a backfill or an outage: instead of one sendMessage per post, posts
+are listed in digests that each stay under Telegram's 4096 character limit.
+"""
+import html
+import os
+
+DIGEST_THRESHOLD = int(os.getenv("DIGEST_THRESHOLD", "10"))
+MESSAGE_LIMIT = 4096
+HEADER_RESERVE = 64  # room kept in every digest for its header line
+MAX_TITLE = 200  # characters; keeps even a fully escaped entry well under the limit
+MAX_FIELD = 100
+
+
+def telegram_length(text):
+    """Length as Telegram counts it (UTF-16 code units)"""
+    return len(text.encode('utf-16-le')) // 2
+
+
+def escape_html(text):
+    return html.escape(text or "", quote=False)
+
+
+def escape_markdown(text):
+    """Escape text for Telegram's legacy Markdown parse mode"""
+    text = text or ""
+    # Only these four can be escaped; a backslash itself cannot, and shows as typed
+    for char in ('_', '*', '`', '['):
+        text = text.replace(char, '\\' + char)
+    return text
+
+
+def markdown_url(url):
+    # A bare ')' would end the link early
+    return (url or "").replace(')', '%29')
+
+
+def _shorten(text, limit):
+    text = text or ""
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def format_alert(post, count=None, parse_mode='HTML'):
+    """Single new-review alert; count numbers it within a batch (HTML only)"""
+    badge_text = ", ".join(post['badges']) if post['badges'] else "No badges"
+    if parse_mode == 'HTML':
+        count_text = f" #{count}" if count else ""
+        return f"""🚨 <b>New Review Alert!{count_text}</b>
+
+📝 <b>Title:</b> {escape_html(post['title'])}
+🏢 <b>Company:</b> {escape_html(post['company'])}
+💼 <b>Role:</b> {escape_html(post['role'])}
+🏷️ <b>Type:</b> {escape_html(badge_text)}
+
+🔗 <a href="{html.escape(post['link'])}">View Full Post</a>"""
+
+    return f"""
+🚨 *New Review Alert!* 
+
+📝 *Title:* {escape_markdown(post["title"])}
+🏢 *Company:* {escape_markdown(post["company"])}
+💼 *Role:* {escape_markdown(post["role"])}
+🏷️ *Type:* {escape_markdown(badge_text)}
+
+🔗 [View Full Post]({markdown_url(post["link"])})
+"""
+
+
+def format_edit_alert(post, old, parse_mode='HTML'):
+    """Alert for a known post whose listing changed; changed fields show the old value"""
+    fields = [
+        ("📝", "Title", post['title'], old['title']),
+        ("🏢", "Company", post['company'], old['company']),
+        ("💼", "Role", post['role'], old['role']),
+        ("🏷️", "Type", ", ".join(post['badges']) or "No badges", ", ".join(old['badges']) or "No badges"),
+    ]
+    lines = []
+    for icon, label, new, before in fields:
+        if parse_mode == 'HTML':
+            line = f"{icon} <b>{label}:</b> {escape_html(new)}"
+            if new != before:
+                line += f" <i>(was: {escape_html(_shorten(before, MAX_FIELD))})</i>"
+        else:
+            line = f"{icon} *{label}:* {escape_markdown(new)}"
+            if new != before:
+                line += f" (was: {escape_markdown(_shorten(before, MAX_FIELD))})"
+        lines.append(line)
+    body = "\n".join(lines)
+
+    if parse_mode == 'HTML':
+        return f"""✏️ <b>Review Edited</b>
+
+{body}
+
+🔗 <a href="{html.escape(post['link'])}">View Full Post</a>"""
+
+    return f"""✏️ *Review Edited*
+
+{body}
+
+🔗 [View Full Post]({markdown_url(post["link"])})"""
+
+
+def format_digest_entry(post, number, parse_mode='HTML'):
+    title = _shorten(post['title'], MAX_TITLE)
+    company = _shorten(post['company'], MAX_FIELD)
+    role = _shorten(post['role'], MAX_FIELD)
+    badges = _shorten(", ".join(post['badges']) if post['badges'] else "No badges", MAX_FIELD)
+    if parse_mode == 'HTML':
+        return (
+            f"{number}. <a href=\"{html.escape(post['link'])}\">{escape_html(title)}</a>\n"
+            f"   🏢 {escape_html(company)} · 💼 {escape_html(role)} · 🏷️ {escape_html(badges)}\n"
+        )
+    return (
+        f"{number}. {escape_markdown(title)} - [View]({markdown_url(post['link'])})\n"
+        f"   🏢 {escape_markdown(company)} · 💼 {escape_markdown(role)} · 🏷️ {escape_markdown(badges)}\n"
+    )
+
+
+def _header(total, suffix, parse_mode):
+    if parse_mode == 'HTML':
+        return f"📰 <b>{total} New Reviews{suffix}</b>\n\n"
+    return f"📰 *{total} New Reviews{suffix}*\n\n"
+
+
+def split_digests(posts, parse_mode='HTML', limit=MESSAGE_LIMIT, start=1):
+    """Group posts into digest-sized runs of (number, entry) pairs, numbered from start"""
+    body_limit = limit - HEADER_RESERVE
+    chunks = []
+    current = []
+    current_length = 0
+    for number, post in enumerate(posts, start):
+        entry = format_digest_entry(post, number, parse_mode)
+        length = telegram_length(entry) + 1
+        if current and current_length + length > body_limit:
+            chunks.append(current)
+            current = []
+            current_length = 0
+        current.append((number, entry))
+        current_length += length
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def render_digest(chunk, parse_mode='HTML', total=None, part=None, parts=None):
+    """Message text for one chunk from split_digests"""
+    if parts and parts > 1:
+        suffix = f" ({part}/{parts})"
+    elif chunk[0][0] > 1:
+        # Streaming digests do not know the final count; show the range instead
+        suffix = f" (#{chunk[0][0]}-{chunk[-1][0]})"
+    else:
+        suffix = ""
+    header = _header(total or len(chunk), suffix, parse_mode)
+    return header + "\n".join(entry for _, entry in chunk)
+
+
+def build_digests(posts, parse_mode='HTML', limit=MESSAGE_LIMIT):
+    """Return message texts listing posts, numbered in the order given"""
+    chunks = split_digests(posts, parse_mode, limit)
+    return [
+        render_digest(chunk, parse_mode, len(posts), part, len(chunks))
+        for part, chunk in enumerate(chunks, 1)
+    ]
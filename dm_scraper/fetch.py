@@ -0,0 +1,399 @@
+"""Shared HTTP session for all page fetches in a run.
+
+The scraper (and its connection pool) is created once per process instead of
+once per page, and the Cloudflare clearance cookies plus the user agent they
+were issued for are saved to SESSION_FILE so the next run can skip the
+challenge while the clearance is still valid.
+
+Every response is classified as ok, blocked (403 or a Cloudflare challenge),
+rate limited (429) or error (5xx, network failure). fetch() retries the last
+three with jittered exponential backoff and raises FetchError once the
+retries are used up, so a wall is never mistaken for an empty page. A
+circuit breaker shared by all threads pauses every request together when
+the site keeps refusing them.
+"""
+import json
+import os
+import random
+import re
+import threading
+import time
+
+import cloudscraper
+import requests
+
+from .metrics import count, phase
+from .util import atomic_write, log
+
+SESSION_FILE = os.getenv("SESSION_FILE", "cf_session.json")
+REQUEST_TIMEOUT = 30
+
+BROWSER = {
+    'browser': 'chrome',
+    'platform': 'windows',
+    'desktop': True
+}
+
+FALLBACK_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Sec-Fetch-User': '?1',
+}
+
+CRAWL_DELAY = float(os.getenv("CRAWL_DELAY", "0"))  # Minimum seconds between requests
+MAX_CRAWL_DELAY = 30.0
+FETCH_RETRIES = int(os.getenv("FETCH_RETRIES", "4"))  # Retries of a blocked, rate-limited or failed request
+BACKOFF_BASE = float(os.getenv("BACKOFF_BASE", "2"))  # Seconds before the first retry, doubled for each one after
+BACKOFF_MAX = 60.0
+MAX_RETRY_AFTER = float(os.getenv("MAX_RETRY_AFTER", "120"))  # Longest Retry-After waited; longer fails the fetch
+BREAKER_THRESHOLD = int(os.getenv("BREAKER_THRESHOLD", "5"))  # Refusals in a row that pause every request
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "60"))  # Seconds of the first pause, doubled while refusals go on
+MAX_BREAKER_COOLDOWN = 900.0
+
+OK = 'ok'
+BLOCKED = 'blocked'
+RATE_LIMITED = 'rate_limited'
+ERROR = 'error'
+EMPTY = 'empty'  # a 200 page with neither posts nor the end-of-list markup (see pipeline.get_page_posts)
+
+# Markup of a Cloudflare challenge page. Reviews are user text and may well
+# say "just a moment", but can't add a <title> or the challenge script
+CHALLENGE_RE = re.compile(r'<title>\s*Just a moment|id=["\']challenge-form', re.IGNORECASE)
+
+_lock = threading.Lock()
+_scraper = None
+_fallback = None
+_fetch_times = []
+
+
+class FetchError(Exception):
+    """A page that could not be fetched; kind is BLOCKED, RATE_LIMITED, ERROR or EMPTY"""
+
+    def __init__(self, url, kind, detail=""):
+        self.url = url
+        self.kind = kind
+        super().__init__(f"{kind.replace('_', ' ')} fetching {url}" + (f" ({detail})" if detail else ""))
+
+
+def is_blocked(response):
+    """Return True if the response is a Cloudflare block or challenge page"""
+    if response.status_code == 403 or response.headers.get('cf-mitigated') == 'challenge':
+        return True
+    return CHALLENGE_RE.search(response.text) is not None
+
+
+def classify(response):
+    """OK, BLOCKED, RATE_LIMITED or ERROR; a 404 is OK and left to the caller"""
+    if response.status_code == 429:
+        return RATE_LIMITED
+    if is_blocked(response):
+        return BLOCKED
+    if response.status_code >= 500:
+        return ERROR
+    return OK
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Seconds before retry number `attempt`: exponential, jittered over its upper half"""
+    ceiling = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1))
+    delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+    return max(delay, min(retry_after or 0, MAX_RETRY_AFTER))
+
+
+def _retry_after(response):
+    value = response.headers.get('Retry-After', '') if response is not None else ''
+    return int(value) if value.isdigit() else None
+
+
+class RateLimiter:
+    """Space out requests across threads and back off while the site blocks us.
+
+    The interval doubles on every blocked or rate-limited response and decays
+    back towards min_interval on successful ones. A Retry-After header pushes
+    the next slot out for everyone. Outcomes are tallied for the block rate.
+    """
+
+    def __init__(self, min_interval=0.0, max_interval=MAX_CRAWL_DELAY):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.blocked = 0  # blocked and rate-limited responses
+        self.outcomes = {}
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def record(self, kind, response=None):
+        with self._lock:
+            self.outcomes[kind] = self.outcomes.get(kind, 0) + 1
+            if kind in (BLOCKED, RATE_LIMITED):
+                self.blocked += 1
+                count(f'http_{kind}')
+                self.interval = min(self.max_interval, max(self.interval * 2, 1.0))
+                retry_after = _retry_after(response)
+                if retry_after:
+                    self._next_slot = max(self._next_slot, time.monotonic() + min(retry_after, MAX_RETRY_AFTER))
+                log(f"🐢 {kind.replace('_', ' ').capitalize()} - slowing down to one request every "
+                    f"{self.interval:.1f}s")
+            elif kind == OK and self.interval > self.min_interval:
+                self.interval = max(self.min_interval, self.interval * 0.8)
+
+    def block_rate(self):
+        with self._lock:
+            total = sum(self.outcomes.values())
+            return self.blocked / total if total else 0.0
+
+
+class CircuitBreaker:
+    """Pause every request together while the site keeps refusing them.
+
+    `threshold` failed requests in a row (from any thread) open the circuit:
+    every fetch waits out the cool-down instead of each worker backing off
+    on its own and the wall seeing a burst of retries. After it one probe
+    request goes out alone; success closes the circuit, another failure
+    opens it again for twice as long.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN,
+                 max_cooldown=MAX_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened = 0
+        self.open_until = 0.0  # 0 while closed
+        self.probing = False
+        self._cond = threading.Condition()
+
+    def wait(self):
+        with self._cond:
+            while self.open_until:
+                now = time.monotonic()
+                if now < self.open_until:
+                    self._cond.wait(self.open_until - now)
+                elif self.probing:
+                    self._cond.wait()
+                else:
+                    # Half-open: this request is the probe
+                    self.probing = True
+                    return
+
+    def record(self, ok):
+        with self._cond:
+            if ok:
+                if self.open_until:
+                    log("✅ Circuit closed - requests flowing again")
+                self.failures = 0
+                self.open_until = 0.0
+                self.probing = False
+                self.cooldown = self.base_cooldown
+            elif self.probing:
+                self.probing = False
+                self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+                self._open("the probe request failed")
+            else:
+                self.failures += 1
+                if not self.open_until and self.failures >= self.threshold:
+                    self._open(f"{self.failures} failed requests in a row")
+            self._cond.notify_all()
+
+    def _open(self, reason):
+        self.opened += 1
+        self.open_until = time.monotonic() + self.cooldown
+        count('circuit_opened')
+        log(f"⛔ Circuit open ({reason}) - pausing all requests for {self.cooldown:.0f}s")
+
+
+limiter = RateLimiter(CRAWL_DELAY)
+breaker = CircuitBreaker()
+
+
+def _load_saved_session(session):
+    """Restore clearance cookies and user agent from SESSION_FILE"""
+    try:
+        with open(SESSION_FILE, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+    except FileNotFoundError:
+        return False
+    except (json.JSONDecodeError, OSError) as e:
+        log(f"⚠️ Ignoring unreadable session file: {e}")
+        return False
+
+    now = time.time()
+    restored = 0
+    for cookie in saved.get('cookies', []):
+        if cookie.get('expires') and cookie['expires'] < now:
+            continue
+        session.cookies.set(
+            cookie['name'],
+            cookie['value'],
+            domain=cookie.get('domain', ''),
+            path=cookie.get('path', '/'),
+            expires=cookie.get('expires')
+        )
+        restored += 1
+
+    # Clearance cookies are bound to the user agent they were issued for
+    if saved.get('user_agent'):
+        session.headers['User-Agent'] = saved['user_agent']
+
+    log(f"🍪 Restored {restored} cookies from {SESSION_FILE}")
+    return restored > 0
+
+
+def get_session():
+    """Return the shared cloudscraper session, creating it on first use"""
+    global _scraper
+    with _lock:
+        if _scraper is None:
+            _scraper = cloudscraper.create_scraper(browser=BROWSER)
+            _load_saved_session(_scraper)
+        return _scraper
+
+
+def _get_fallback_session():
+    global _fallback
+    with _lock:
+        if _fallback is None:
+            _fallback = requests.Session()
+            _fallback.headers.update(FALLBACK_HEADERS)
+        return _fallback
+
+
+def save_session():
+    """Persist the current cookies and user agent for the next run"""
+    if _scraper is None:
+        return
+
+    cookies = [
+        {
+            'name': c.name,
+            'value': c.value,
+            'domain': c.domain,
+            'path': c.path,
+            'expires': c.expires
+        }
+        for c in _scraper.cookies
+    ]
+    data = {
+        'user_agent': _scraper.headers.get('User-Agent'),
+        'cookies': cookies,
+        'saved_at': time.time()
+    }
+    try:
+        atomic_write(SESSION_FILE, json.dumps(data, indent=2))
+        log(f"🍪 Saved {len(cookies)} cookies to {SESSION_FILE}")
+    except OSError as e:
+        log(f"⚠️ Could not save session: {e}")
+
+
+def _get(url, headers):
+    """One GET on the shared session, falling back to plain requests"""
+    try:
+        log("🛡️ Fetching with shared cloudscraper session...", verbose=True)
+        with phase("http"):
+            response = get_session().get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        log(f"📡 Cloudscraper - Response status: {response.status_code}", verbose=True)
+        return response
+    except Exception as e:
+        log(f"⚠️ Cloudscraper failed: {e}")
+        log("🔄 Falling back to requests with headers...")
+        count('http_fallbacks')
+        with phase("http"):
+            response = _get_fallback_session().get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        log(f"📡 Requests fallback - Response status: {response.status_code}")
+        return response
+
+
+def fetch(url, headers=None):
+    """Fetch a URL, retrying blocked, rate-limited and failed requests.
+
+    Raises FetchError with the last failure's kind once FETCH_RETRIES
+    retries are used up.
+    """
+    started = time.perf_counter()
+    try:
+        for attempt in range(FETCH_RETRIES + 1):
+            if attempt:
+                delay = backoff_delay(attempt, _retry_after(response))
+                log(f"🔁 {kind.replace('_', ' ').capitalize()} - retry {attempt}/{FETCH_RETRIES} "
+                    f"in {delay:.1f}s: {url}")
+                count('http_retries')
+                with phase("backoff"):
+                    time.sleep(delay)
+            with phase("rate_limit_wait"):
+                breaker.wait()
+                limiter.wait()
+
+            try:
+                response = _get(url, headers)
+            except Exception as e:
+                response = None
+                kind = ERROR
+                detail = str(e)
+            else:
+                kind = classify(response)
+                detail = f"HTTP {response.status_code}"
+                count('http_requests')
+                count('http_bytes', len(response.content))
+            limiter.record(kind, response)
+            breaker.record(kind == OK)
+
+            if kind == OK:
+                if response.status_code == 304:
+                    count('http_not_modified')
+                return response
+            retry_after = _retry_after(response)
+            if retry_after is not None and retry_after > MAX_RETRY_AFTER:
+                # Waiting would hold this worker for that long; the next run can try again
+                log(f"⛔ Retry-After {retry_after}s is longer than MAX_RETRY_AFTER ({MAX_RETRY_AFTER:.0f}s) - "
+                    f"giving up on {url}")
+                count('http_retry_after_too_long')
+                detail += f", Retry-After {retry_after}s"
+                break
+        count('http_failures')
+        raise FetchError(url, kind, detail)
+    finally:
+        with _lock:
+            _fetch_times.append(time.perf_counter() - started)
+
+
+def reset_fetch_stats():
+    """Start a new run's fetch latencies (each daemon poll is a run)"""
+    with _lock:
+        _fetch_times.clear()
+
+
+def log_fetch_stats():
+    """Log per-page fetch latency for this run"""
+    with _lock:
+        times = list(_fetch_times)
+    if not times:
+        return
+
+    ordered = sorted(times)
+    median = ordered[len(ordered) // 2]
+    log(f"⏱️ Fetched {len(times)} pages in {sum(times):.2f}s "
+        f"(first: {times[0]:.2f}s, median: {median:.2f}s, max: {ordered[-1]:.2f}s)")
+    if len(times) > 1:
+        rest = times[1:]
+        log(f"⏱️ Warm-session average: {sum(rest) / len(rest):.2f}s per page")
+    if limiter.blocked or breaker.opened:
+        outcomes = ", ".join(f"{n} {kind.replace('_', ' ')}" for kind, n in sorted(limiter.outcomes.items()))
+        log(f"🐢 Block rate {limiter.block_rate():.1%} ({outcomes}); "
+            f"circuit opened {breaker.opened} times")
@@ -0,0 +1,212 @@
+"""History export: every post each crawl saw, for offline analysis.
+
+The store keeps one row per post; the history keeps one row per post per
+crawl, with where it was listed:
+
+    crawled_at, page, position, id, title, link, company, role, badges, first_seen
+
+Times are Unix seconds (UTC) and badges are joined with "|"; when a post
+was last seen is the crawled_at of its newest row (load_history(latest=True)). Rows go to
+HISTORY_DIR/posts-YYYY-MM.csv.gz by crawl start month. Each batch of up to
+HISTORY_BATCH rows is appended as its own gzip member, so a crawl never
+rewrites what is already there, and gzip, zcat, pandas.read_csv and
+load_history() all read a month file as one CSV. A member cut short by a
+crash ends the file for readers; load_history() warns and keeps every row
+that was written out in full.
+
+    python -m dm_scraper.history --since 2026-01-01 --company enosis --latest
+"""
+import argparse
+import csv
+import datetime
+import functools
+import gzip
+import io
+import os
+import sys
+import time
+import zlib
+
+from .metrics import count, timed
+from .store import get_post_id
+from .subscribers import normalize
+from .util import log
+
+HISTORY_BATCH = 5000  # rows per gzip member
+FIELDS = ('crawled_at', 'page', 'position', 'id', 'title', 'link', 'company', 'role', 'badges', 'first_seen')
+BADGE_SEPARATOR = "|"
+FILE_PREFIX = "posts-"
+FILE_SUFFIX = ".csv.gz"
+
+
+def month_file(directory, timestamp):
+    month = datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).strftime('%Y-%m')
+    return os.path.join(directory, f"{FILE_PREFIX}{month}{FILE_SUFFIX}")
+
+
+class HistoryWriter:
+    """Append a crawl's posts to the history, a gzip member per batch"""
+
+    def __init__(self, directory, store, batch=HISTORY_BATCH, crawled_at=None):
+        self.directory = directory
+        self.store = store
+        self.batch = batch
+        self.crawled_at = int(time.time() if crawled_at is None else crawled_at)
+        self.rows = []
+        self.written = 0
+
+    def add(self, page, posts):
+        """Take one crawled page, after its posts were handed to the notifier"""
+        ids = [get_post_id(post) for post in posts]
+        first_seen = self.store.first_seen(ids)
+        now = int(time.time())
+        for position, (post_id, post) in enumerate(zip(ids, posts), 1):
+            self.rows.append((
+                self.crawled_at, page, position, post_id, post.get('title'), post.get('link'),
+                post.get('company'), post.get('role'), BADGE_SEPARATOR.join(post.get('badges') or ()),
+                int(first_seen.get(post_id, now))
+            ))
+        if len(self.rows) >= self.batch:
+            self.flush()
+
+    @timed("history")
+    def flush(self):
+        """Append the buffered rows as one gzip member"""
+        if not self.rows:
+            return
+        path = month_file(self.directory, self.crawled_at)
+        os.makedirs(self.directory, exist_ok=True)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        if not os.path.exists(path) or not os.path.getsize(path):
+            writer.writerow(FIELDS)
+        writer.writerows(self.rows)
+        data = gzip.compress(buffer.getvalue().encode('utf-8'), mtime=0)
+        # One write per member, so a crash leaves at most one damaged member at the end
+        with open(path, 'ab') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        count('history_rows', len(self.rows))
+        self.written += len(self.rows)
+        log(f"🗄️ Appended {len(self.rows)} posts to {path}", verbose=True)
+        self.rows = []
+
+
+def _timestamp(value):
+    """Unix seconds from a datetime, a YYYY-MM-DD string or a number"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.timestamp()
+
+
+def history_files(directory, since=None, until=None):
+    """Month files in chronological order, skipping months outside since..until"""
+    try:
+        names = sorted(n for n in os.listdir(directory) if n.startswith(FILE_PREFIX) and n.endswith(FILE_SUFFIX))
+    except FileNotFoundError:
+        return []
+    first = month_file("", since)[len(FILE_PREFIX):] if since is not None else None
+    last = month_file("", until)[len(FILE_PREFIX):] if until is not None else None
+    return [
+        os.path.join(directory, name) for name in names
+        if (first is None or name[len(FILE_PREFIX):] >= first) and (last is None or name[len(FILE_PREFIX):] <= last)
+    ]
+
+
+def _read_rows(path):
+    """CSV rows of a month file (header skipped), stopping at a damaged member"""
+    with gzip.open(path, 'rt', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        try:
+            next(reader, None)
+            yield from reader
+        except (EOFError, gzip.BadGzipFile, zlib.error) as e:
+            log(f"⚠️ {path} ends in a damaged batch ({e}) - later rows skipped")
+
+
+def _matching_rows(directory, since, until, company, role, badge, latest):
+    """Raw CSV rows that pass the filters, oldest crawl first"""
+    since = _timestamp(since)
+    until = _timestamp(until)
+    company = normalize(company) if company else None
+    role = normalize(role) if role else None
+    badge = normalize(badge) if badge else None
+    # Companies, roles and badges repeat across crawls, so each is normalized once
+    normalized = functools.lru_cache(maxsize=None)(normalize)
+    crawled_at, company_at, role_at, badges_at = (FIELDS.index(f) for f in ('crawled_at', 'company', 'role', 'badges'))
+
+    rows = []
+    for path in history_files(directory, since, until):
+        for row in _read_rows(path):
+            if since is not None or until is not None:
+                at = int(row[crawled_at])
+                if (since is not None and at < since) or (until is not None and at > until):
+                    continue
+            if company is not None and normalized(row[company_at]) != company:
+                continue
+            if role is not None and normalized(row[role_at]) != role:
+                continue
+            if badge is not None and badge not in (normalized(b) for b in row[badges_at].split(BADGE_SEPARATOR)):
+                continue
+            rows.append(row)
+
+    if latest:
+        post_id = FIELDS.index('id')
+        rows = list({row[post_id]: row for row in rows}.values())
+    return rows
+
+
+@timed("history_load")
+def load_history(directory="history", since=None, until=None, company=None, role=None, badge=None,
+                 latest=False):
+    """History rows as dicts, oldest crawl first.
+
+    since/until (datetimes, YYYY-MM-DD strings or Unix seconds, UTC when
+    naive) bound crawled_at; whole months outside them are never opened.
+    company, role and badge match like subscriber filters (case and extra
+    spaces ignored). With latest, only each post's most recent row is kept.
+    """
+    return [_row_to_dict(row) for row in _matching_rows(directory, since, until, company, role, badge, latest)]
+
+
+def _row_to_dict(row):
+    crawled_at, page, position, post_id, title, link, company, role, badges, first_seen = row
+    return {
+        'crawled_at': int(crawled_at), 'page': int(page), 'position': int(position), 'id': post_id,
+        'title': title, 'link': link, 'company': company, 'role': role,
+        'badges': badges.split(BADGE_SEPARATOR) if badges else [],
+        'first_seen': int(first_seen),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load and filter the exported post history")
+    parser.add_argument('--dir', default=os.getenv("HISTORY_DIR") or "history", help="history directory")
+    parser.add_argument('--since', help="first crawl date, YYYY-MM-DD (UTC)")
+    parser.add_argument('--until', help="last crawl date, YYYY-MM-DD (UTC)")
+    parser.add_argument('--company')
+    parser.add_argument('--role')
+    parser.add_argument('--badge')
+    parser.add_argument('--latest', action='store_true', help="only each post's most recent row")
+    parser.add_argument('--limit', type=int, default=20, help="rows to print")
+    args = parser.parse_args(argv)
+
+    until = args.until and datetime.datetime.fromisoformat(args.until) + datetime.timedelta(days=1, seconds=-1)
+    started = time.perf_counter()
+    rows = load_history(args.dir, args.since, until, args.company, args.role, args.badge, args.latest)
+    elapsed = time.perf_counter() - started
+
+    for row in rows[-args.limit:] if args.limit else []:
+        crawled = datetime.datetime.fromtimestamp(row['crawled_at'], datetime.timezone.utc).strftime('%Y-%m-%d %H:%M')
+        print(f"{crawled}  p{row['page']}#{row['position']}  {row['company']} · {row['role']} · {row['title']}")
+    print(f"🗄️ {len(rows)} rows in {elapsed * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""Per-phase timings and counters for a run, written as JSON and Prometheus text.
+
+Phases are wall-clock time spent inside a named block (`with phase("fetch")`
+or the @timed decorator), summed over every call. They nest and, with
+concurrent workers, can add up to more than the run itself: "fetch" inside
+"pipeline" counts towards both. Counters are plain running totals.
+
+At the end of a run write_report() saves METRICS_FILE (JSON) and
+METRICS_TEXTFILE, a Prometheus textfile for node_exporter's textfile
+collector. Set either to an empty string to skip it.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from .util import atomic_write, log
+
+METRICS_FILE = os.getenv("METRICS_FILE", "run_metrics.json")
+METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE", "run_metrics.prom")
+METRIC_PREFIX = "deshimula"
+
+_lock = threading.Lock()
+_phases = {}
+_counters = {}
+_started = time.time()
+_started_clock = time.perf_counter()
+
+
+def reset_metrics():
+    """Start a new run: clear every phase and counter and restart the clock"""
+    global _started, _started_clock
+    with _lock:
+        _phases.clear()
+        _counters.clear()
+        _started = time.time()
+        _started_clock = time.perf_counter()
+
+
+@contextmanager
+def phase(name):
+    """Add the wall time spent in the block to the named phase"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        with _lock:
+            entry = _phases.setdefault(name, [0.0, 0])
+            entry[0] += elapsed
+            entry[1] += 1
+
+
+def timed(name):
+    """Decorator form of phase()"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, amount=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def _rate(amount, seconds):
+    return round(amount / seconds, 3) if seconds > 0 else 0.0
+
+
+def report(script=None):
+    """Snapshot of everything recorded so far, with derived rates"""
+    with _lock:
+        phases = {name: {'seconds': round(total, 4), 'calls': calls} for name, (total, calls) in _phases.items()}
+        counters = {name: round(value, 4) if isinstance(value, float) else value for name, value in _counters.items()}
+    duration = time.perf_counter() - _started_clock
+
+    scrape_seconds = max(
+        (phases[name]['seconds'] for name in ('pipeline',) if name in phases),
+        default=duration
+    )
+    requests = counters.get('http_requests', 0)
+    return {
+        'script': script,
+        'started': _started,
+        'duration_seconds': round(duration, 4),
+        'phases': phases,
+        'counters': counters,
+        'rates': {
+            'posts_per_second': _rate(counters.get('posts_scraped', 0), scrape_seconds),
+            'pages_per_second': _rate(counters.get('pages_scraped', 0), scrape_seconds),
+            'messages_per_second': _rate(counters.get('telegram_sent', 0), phases.get('telegram', {}).get('seconds', 0)),
+            'blocked_ratio': round(counters.get('http_blocked', 0) / requests, 4) if requests else 0.0,
+            'rate_limited_ratio': round(counters.get('http_rate_limited', 0) / requests, 4) if requests else 0.0,
+        }
+    }
+
+
+def _prometheus_name(name):
+    return f"{METRIC_PREFIX}_{''.join(c if c.isalnum() else '_' for c in name)}"
+
+
+def format_prometheus(data):
+    label = f'script="{data["script"] or ""}"'
+    lines = [
+        f"# HELP {METRIC_PREFIX}_phase_seconds Wall time spent in each phase of the last run",
+        f"# TYPE {METRIC_PREFIX}_phase_seconds gauge",
+    ]
+    for name, entry in sorted(data['phases'].items()):
+        lines.append(f'{METRIC_PREFIX}_phase_seconds{{{label},phase="{name}"}} {entry["seconds"]}')
+    lines += [
+        f"# HELP {METRIC_PREFIX}_phase_calls Times each phase ran in the last run",
+        f"# TYPE {METRIC_PREFIX}_phase_calls gauge",
+    ]
+    for name, entry in sorted(data['phases'].items()):
+        lines.append(f'{METRIC_PREFIX}_phase_calls{{{label},phase="{name}"}} {entry["calls"]}')
+    for name, value in sorted(data['counters'].items()):
+        metric = _prometheus_name(name)
+        lines += [f"# TYPE {metric} gauge", f"{metric}{{{label}}} {value}"]
+    for name, value in sorted(data['rates'].items()):
+        metric = _prometheus_name(name)
+        lines += [f"# TYPE {metric} gauge", f"{metric}{{{label}}} {value}"]
+    lines += [
+        f"# TYPE {METRIC_PREFIX}_run_duration_seconds gauge",
+        f"{METRIC_PREFIX}_run_duration_seconds{{{label}}} {data['duration_seconds']}",
+        f"# TYPE {METRIC_PREFIX}_last_run_timestamp_seconds gauge",
+        f"{METRIC_PREFIX}_last_run_timestamp_seconds{{{label}}} {int(time.time())}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def write_report(script=None, json_path=METRICS_FILE, textfile_path=METRICS_TEXTFILE):
+    """Log a one-line phase summary and write the JSON report and Prometheus textfile"""
+    data = report(script)
+    summary = ", ".join(
+        f"{name} {entry['seconds']:.2f}s"
+        for name, entry in sorted(data['phases'].items(), key=lambda item: -item[1]['seconds'])
+    )
+    log(f"⏱️ Phases: {summary or 'none'} (run {data['duration_seconds']:.1f}s)")
+    try:
+        if json_path:
+            atomic_write(json_path, json.dumps(data, indent=2))
+        if textfile_path:
+            # The textfile collector may read at any moment
+            atomic_write(textfile_path, format_prometheus(data))
+    except OSError as e:
+        log(f"⚠️ Could not write metrics: {e}")
+    return data
@@ -0,0 +1,139 @@
+"""Recent-posts monitor behind 1st-dm-post.py: the first pages of the site,
+checked once or polled by a long-running daemon.
+"""
+import random
+import signal
+import threading
+
+from .cache import page_cache
+from .crawl import iter_pages, iter_until_known
+from .fetch import limiter, log_fetch_stats, reset_fetch_stats, save_session
+from .history import HistoryWriter
+from .metrics import reset_metrics, write_report
+from .pipeline import Notifier, get_page_posts, page_url, run_pipeline
+from .store import SeenStore
+from .subscribers import load_subscribers
+from .telegram import TelegramSender, drain_outbox
+from .util import log
+
+POLL_BACKOFF = 1.5  # Interval growth after each poll with nothing new
+PAGE_DELAY = 2  # Seconds between pages on a full (non-incremental) scan
+
+
+def monitor_pages(config, store, incremental):
+    """Crawler for one check: only the new pages in incremental mode, else the first max_pages"""
+    def get_posts(url):
+        return get_page_posts(url, config.base_url)
+
+    def url(page):
+        return page_url(config.base_url, page)
+
+    if incremental and store:
+        # The newest post processed by the last run
+        high_water_id = store.get_high_water()
+        high_water = store.get(high_water_id) if high_water_id else None
+        log(f"⚡ Incremental crawl - stopping at high-water post: {high_water['title'] if high_water else 'none'}")
+        return iter_until_known(get_posts, url, 1, store, high_water_id, config.max_pages, config.deep_scan_pages)
+
+    log(f"🌐 Checking for new posts from first {config.max_pages} pages...")
+    return iter_pages(get_posts, url, 1, end_page=config.max_pages, delay=PAGE_DELAY)
+
+
+def check_for_new_posts(config, store, sender, incremental=None):
+    """Scrape, alert on new posts and update the store; returns the number of new posts"""
+    incremental = config.incremental if incremental is None else incremental
+    reseed = store.needs_reseed()
+    if reseed:
+        # The store was rebuilt after corruption; alerting now would repeat old posts
+        log("🩹 Store was rebuilt - recording current posts without notifications")
+    elif not store:
+        log("📄 No previous posts found - first run detected, every current post will be announced")
+
+    subscribers = load_subscribers(config.chat_id, config.subscribers_file)
+    notifier = Notifier(store, sender, subscribers, 'Markdown', fetch_details=config.fetch_details,
+                        edit_alerts=config.edit_alerts)
+    history = HistoryWriter(config.history_dir, store) if config.history_dir else None
+    summary = run_pipeline(monitor_pages(config, store, incremental), store, notifier, reseed, high_water_page=1,
+                           history=history)
+
+    log_fetch_stats()
+    save_session()
+    page_cache.log_stats()
+    page_cache.save()
+    log(f"✅ Monitoring complete - {summary['pages']} pages, {summary['posts']} posts, "
+        f"{summary['new']} new, {summary['updated']} edited, {summary['sent']} notifications sent")
+    return summary['new']
+
+
+def next_poll_interval(config, interval, new_count, blocked):
+    """Poll again soon while posts are arriving, back off while it is quiet or blocked"""
+    if blocked:
+        return config.poll_max_interval
+    if new_count:
+        return config.poll_min_interval
+    return min(config.poll_max_interval, interval * POLL_BACKOFF)
+
+
+def run_daemon(config, store, sender):
+    """Keep polling page 1 with a warm session until SIGTERM or Ctrl+C"""
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    log(f"👀 Daemon mode - polling every {config.poll_min_interval}-{config.poll_max_interval}s")
+    interval = config.poll_min_interval
+    cycles = 0
+    while not stop.is_set():
+        cycles += 1
+        blocked_before = limiter.blocked
+        log(f"🔄 Poll #{cycles}")
+        try:
+            if cycles > 1:
+                # Each poll is a run for the outbox, so what failed last poll
+                # is retried now rather than when the next new post is queued;
+                # the first poll shares the startup drain's run. Its metrics
+                # cover only this poll too, so nothing grows with the uptime
+                store.start_run()
+                reset_metrics()
+                reset_fetch_stats()
+                pending = store.pending_count()
+                if pending:
+                    log(f"📬 Retrying {pending} queued notifications")
+                    drain_outbox(store, sender)
+            new_count = check_for_new_posts(config, store, sender, incremental=True)
+        except Exception as e:
+            log(f"❌ Poll failed: {e}")
+            new_count = 0
+        write_report("1st-dm-post")
+
+        interval = next_poll_interval(config, interval, new_count, limiter.blocked > blocked_before)
+        # Jitter keeps the polls from landing on a fixed cadence
+        delay = interval * random.uniform(0.9, 1.1)
+        log(f"💤 Next poll in {delay:.0f}s ({len(store)} posts known)")
+        stop.wait(delay)
+
+    log(f"👋 Daemon stopped after {cycles} polls")
+
+
+def run_monitor(config):
+    log("🔍 DeshiMula Review Monitor Started")
+    store = SeenStore()
+    sender = TelegramSender(config.telegram_token)
+    log(f"📊 Seen store: {len(store)} posts")
+
+    # Finish what an interrupted run left behind before scraping again
+    pending = store.pending_count()
+    if pending:
+        log(f"📬 Resuming {pending} queued notifications from a previous run")
+        drain_outbox(store, sender)
+
+    if config.daemon:
+        run_daemon(config, store, sender)
+    else:
+        check_for_new_posts(config, store, sender)
+
+    sender.log_stats()
+    # Show final store statistics
+    log(f"📈 Seen store: {len(store)} posts")
+    store.close()
+    write_report("1st-dm-post")
@@ -0,0 +1,221 @@
+"""Listing page extractors.
+
+All backends return the same list of post dicts for a stories page:
+
+- "bs4": the original BeautifulSoup/html.parser walk, kept as the reference
+- "strainer": BeautifulSoup limited by a SoupStrainer to the post containers
+- "lxml": lxml.html with precompiled XPath selectors (fastest)
+
+PARSER_BACKEND selects one; "auto" uses lxml when it is installed.
+
+Posts are Post records: slotted objects that read like the post dicts used
+elsewhere (post['title'], post.get('badges')), at a fraction of the memory.
+Company, role and badge strings repeat across thousands of posts and are
+interned, so each distinct value is stored once.
+"""
+import os
+import sys
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from .metrics import count, phase
+from .store import get_post_id
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # pragma: no cover - lxml is optional
+    lxml = None
+
+PARSER_BACKEND = os.getenv("PARSER_BACKEND", "auto")
+
+CONTAINER_CLASS = 'container mt-5'
+
+
+def _intern(value):
+    return sys.intern(value) if value is not None else None
+
+
+class Post:
+    """One listing post with dict-style read access"""
+
+    __slots__ = ('id', 'title', 'link', 'company', 'role', 'badges')
+
+    def __init__(self, title, link, company, role, badges, post_id=None):
+        self.title = title
+        self.link = link
+        self.company = _intern(company)
+        self.role = _intern(role)
+        self.badges = tuple(sys.intern(badge) for badge in badges)
+        # Stable identifier: the story number in the link
+        self.id = post_id or get_post_id(self)
+
+    def __getitem__(self, key):
+        if key not in Post.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in Post.__slots__ else default
+
+    def keys(self):
+        return Post.__slots__
+
+    def __eq__(self, other):
+        if not isinstance(other, Post):
+            return NotImplemented
+        return self.to_row() == other.to_row()
+
+    def __repr__(self):
+        return f"Post({self.id!r}, {self.title!r})"
+
+    def to_row(self):
+        """Compact JSON-friendly form: [id, title, link, company, role, [badges]]"""
+        return [self.id, self.title, self.link, self.company, self.role, list(self.badges)]
+
+    @classmethod
+    def from_row(cls, row):
+        post_id, title, link, company, role, badges = row
+        return cls(title, link, company, role, badges, post_id)
+
+
+def _make_post(title, link, company, role, badges):
+    return Post(title, link, company, role, badges)
+
+
+def _extract_from_containers(post_containers, base_url):
+    posts = []
+    for container in post_containers:
+        # Extract title
+        title_elem = container.find('div', class_='post-title')
+        title = title_elem.text.strip() if title_elem else None
+
+        # Extract link
+        link_elem = container.find('a', class_='hyper-link')
+        link = urljoin(base_url, link_elem['href']) if link_elem else None
+
+        # Extract company
+        company_elem = container.find('span', class_='company-name')
+        company = company_elem.text.strip() if company_elem else None
+
+        # Extract role
+        role_elem = container.find('span', class_='reviewer-role')
+        role = role_elem.text.strip() if role_elem else None
+
+        # Extract badges
+        badges = [badge.text.strip() for badge in container.find_all('div', class_='badge')]
+
+        if title and link:
+            posts.append(_make_post(title, link, company, role, badges))
+    return posts
+
+
+def extract_posts_bs4(html, base_url):
+    """Reference extractor: full html.parser tree"""
+    soup = BeautifulSoup(html, 'html.parser')
+    posts = _extract_from_containers(soup.find_all('div', class_=CONTAINER_CLASS), base_url)
+    soup.decompose()
+    return posts
+
+
+_container_strainer = SoupStrainer('div', class_=CONTAINER_CLASS)
+
+
+def extract_posts_strainer(html, base_url):
+    """BeautifulSoup that only builds the post container subtrees"""
+    soup = BeautifulSoup(html, 'html.parser', parse_only=_container_strainer)
+    posts = _extract_from_containers(soup.find_all('div', class_=CONTAINER_CLASS), base_url)
+    soup.decompose()
+    return posts
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+if lxml is not None:
+    _xp_containers = etree.XPath(f"//div[@class='{CONTAINER_CLASS}']")
+    _xp_title = etree.XPath(f".//div[{_has_class('post-title')}]")
+    _xp_link = etree.XPath(f".//a[{_has_class('hyper-link')}]")
+    _xp_company = etree.XPath(f".//span[{_has_class('company-name')}]")
+    _xp_role = etree.XPath(f".//span[{_has_class('reviewer-role')}]")
+    _xp_badges = etree.XPath(f".//div[{_has_class('badge')}]")
+    _xp_review = etree.XPath(f"//div[{_has_class('company-review')}]")
+
+
+def _first_text(xpath, container):
+    found = xpath(container)
+    return found[0].text_content().strip() if found else None
+
+
+def extract_posts_lxml(html, base_url):
+    """lxml extractor with precompiled XPath selectors"""
+    if lxml is None:
+        raise RuntimeError("lxml is not installed")
+    if not html.strip():
+        return []
+    try:
+        root = lxml.html.document_fromstring(html)
+    except ValueError:
+        # Unicode input with an XML encoding declaration
+        root = lxml.html.document_fromstring(html.encode('utf-8'))
+
+    posts = []
+    for container in _xp_containers(root):
+        title = _first_text(_xp_title, container)
+
+        link_elems = _xp_link(container)
+        href = link_elems[0].get('href') if link_elems else None
+        link = urljoin(base_url, href) if href is not None else None
+
+        company = _first_text(_xp_company, container)
+        role = _first_text(_xp_role, container)
+        badges = [badge.text_content().strip() for badge in _xp_badges(container)]
+
+        if title and link:
+            posts.append(_make_post(title, link, company, role, badges))
+    return posts
+
+
+def extract_review_body(html, backend=PARSER_BACKEND):
+    """Text of the company-review div on a post detail page, or None"""
+    if backend == 'auto':
+        backend = 'lxml' if lxml is not None else 'bs4'
+    if backend == 'lxml' and html.strip():
+        try:
+            root = lxml.html.document_fromstring(html)
+        except ValueError:
+            root = lxml.html.document_fromstring(html.encode('utf-8'))
+        found = _xp_review(root)
+        return found[0].text_content().strip() if found else None
+
+    soup = BeautifulSoup(html, 'html.parser')
+    content_div = soup.find('div', class_='company-review')
+    content = content_div.text.strip() if content_div else None
+    soup.decompose()
+    return content
+
+
+BACKENDS = {
+    'bs4': extract_posts_bs4,
+    'strainer': extract_posts_strainer,
+}
+if lxml is not None:
+    BACKENDS['lxml'] = extract_posts_lxml
+
+
+def get_extractor(backend=PARSER_BACKEND):
+    if backend == 'auto':
+        backend = 'lxml' if 'lxml' in BACKENDS else 'bs4'
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown or unavailable parser backend: {backend}")
+    return BACKENDS[backend]
+
+
+def extract_posts(html, base_url, backend=PARSER_BACKEND):
+    """Extract the posts on a listing page with the configured backend"""
+    with phase("parse"):
+        posts = get_extractor(backend)(html, base_url)
+    count('posts_parsed', len(posts))
+    return posts
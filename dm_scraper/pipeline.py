@@ -0,0 +1,364 @@
+"""Streaming fetch -> parse -> diff -> notify pipeline shared by both scripts.
+
+Every stage works on one page at a time:
+
+    pages = iter_pages(...)            # or iter_crawl_pages / iter_until_known
+    summary = run_pipeline(pages, store, Notifier(store, sender, chat_id))
+
+The crawlers yield (page, posts) as pages arrive, diff_pages() sorts each
+page's posts into new, updated (listing fields edited since they were
+stored) and unchanged, and the Notifier queues and sends alerts while the
+crawl is still running. Only the current page and the new posts waiting for
+a message are held in memory, and on a long crawl the first digest goes out
+a few pages in rather than after the last page.
+
+A crawl ends at the first page that really is past the end of the listing.
+A page that cannot be fetched (blocked, rate limited or failing after every
+retry) raises FetchError instead, and run_pipeline() stops there and reports
+the crawl as incomplete rather than treating the wall as the end.
+"""
+import re
+import time
+from collections import deque
+
+from .cache import page_cache
+from .details import fetch_post_contents
+from .digest import DIGEST_THRESHOLD, format_alert, format_edit_alert, render_digest, split_digests
+from .fetch import EMPTY, ERROR, FetchError, backoff_delay, fetch
+from .metrics import count, phase, timed
+from .parse import extract_posts
+from .store import get_post_id, post_fingerprint
+from .subscribers import SubscriberRegistry
+from .telegram import drain_outbox
+from .util import log
+
+# Message of a listing page past the last one. The pagination and footer
+# are on every listing page, so they say nothing about where the list ends
+END_OF_LIST_RE = re.compile(r'No stories found', re.IGNORECASE)
+
+
+def page_url(base_url, page):
+    """Listing URL of a page; page 1 is the home page"""
+    if page == 1:
+        return base_url
+    return stories_url(base_url, page)
+
+
+def stories_url(base_url, page):
+    return f"{base_url}stories/{page}"
+
+
+@timed("get_page_posts")
+def get_page_posts(url, base_url, retries=1):
+    """Scrape the posts on one listing page, reusing the page cache when unchanged.
+
+    Returns [] only for a page past the end of the listing: a 404 or the
+    "No stories found" page. Any other page without posts (changed markup,
+    a maintenance or truncated page) is fetched up to `retries` more times
+    and then raises FetchError, as fetch() does for blocked and failed
+    requests.
+    """
+    for attempt in range(retries + 1):
+        if attempt:
+            delay = backoff_delay(attempt)
+            log(f"🔁 Page without posts doesn't look like the end - retrying in {delay:.1f}s: {url}")
+            with phase("backoff"):
+                time.sleep(delay)
+        posts, response = _scrape_page(url, base_url)
+        if posts is not None:
+            return posts
+        log(f"📝 No posts and no end-of-list markup on {url}: {response.text[:1000]}...", verbose=True)
+        count('pages_empty')
+    raise FetchError(url, EMPTY, f"HTTP {response.status_code}, no posts")
+
+
+def _scrape_page(url, base_url):
+    """(posts, response) for one fetch of a listing page; posts is None when
+    the page has none but is not the end of the listing either"""
+    try:
+        log(f"🌐 Fetching URL: {url}", verbose=True)
+
+        response = fetch(url, page_cache.conditional_headers(url))
+        count('pages_scraped')
+        cached_posts = page_cache.lookup(url, response)
+        if cached_posts is not None:
+            log(f"♻️ Page unchanged - reusing {len(cached_posts)} cached posts", verbose=True)
+            count('posts_scraped', len(cached_posts))
+            return cached_posts, response
+
+        log(f"📡 Response status: {response.status_code}, {len(response.text)} characters", verbose=True)
+        posts = extract_posts(response.text, base_url)
+        count('posts_scraped', len(posts))
+        log(f"🔍 Found {len(posts)} posts on this page", verbose=True)
+
+        if posts:
+            page_cache.store(url, response, posts)
+            return posts, response
+        if response.status_code == 404 or END_OF_LIST_RE.search(response.text):
+            return [], response
+        return None, response
+    except FetchError:
+        raise
+    except Exception as e:
+        log(f"Error scraping page {url}: {e}")
+        raise FetchError(url, ERROR, str(e)) from e
+
+
+def diff_posts(posts, store, found_ids=None):
+    """Return (new_posts, updated_posts); every other post is unchanged.
+
+    One batched fingerprint lookup per call, so the cost stays O(1) per post
+    and nothing beyond the listing is fetched. found_ids carries IDs already
+    seen this run.
+    """
+    found_ids = set() if found_ids is None else found_ids
+    stored = store.fingerprints(get_post_id(post) for post in posts)
+    new_posts = []
+    updated_posts = []
+    for post in posts:
+        post_id = get_post_id(post)
+        # A post can show up twice if the listing shifts during the crawl
+        if post_id in found_ids:
+            continue
+        found_ids.add(post_id)
+        if post_id not in stored:
+            new_posts.append(post)
+        elif stored[post_id] != post_fingerprint(post):
+            updated_posts.append(post)
+    if updated_posts:
+        count('posts_updated', len(updated_posts))
+    return new_posts, updated_posts
+
+
+def find_new_posts(posts, store, found_ids=None):
+    """Posts not in the store; found_ids carries IDs already seen this run"""
+    return diff_posts(posts, store, found_ids)[0]
+
+
+def diff_pages(pages, store, reseed=False):
+    """Yield (page, posts, new_posts, updated_posts) for each (page, posts) from a crawler.
+
+    With reseed (the store was just rebuilt) nothing counts as new or
+    updated, so the crawl is recorded without alerting on posts that were
+    announced before.
+    """
+    found_ids = set()
+    for page, posts in pages:
+        with phase("find_new_posts"):
+            new_posts, updated_posts = ([], []) if reseed else diff_posts(posts, store, found_ids)
+        yield page, posts, new_posts, updated_posts
+
+
+class Notifier:
+    """Queue and send alerts for new posts as a crawl streams in.
+
+    Each new post is routed to the chats whose filters it matches (see
+    dm_scraper.subscribers); a plain chat ID stands for a single chat that
+    gets everything. Per chat, up to `threshold` new posts are held back;
+    if the crawl ends there they go out as individual alerts, oldest first
+    so the last one gets #1. Past the threshold that chat switches to
+    digests, and each digest is sent as soon as it is full. A new post is
+    recorded as seen in the same outbox transaction as its last message;
+    posts no chat wants and known posts are recorded right away.
+
+    With edit_alerts, updated posts get an "edited" alert queued with their
+    new fields, up to `threshold` per run; a bigger wave of edits (the site
+    relabelling badges, say) is only recorded.
+    """
+
+    def __init__(self, store, sender, subscribers, parse_mode='HTML', threshold=DIGEST_THRESHOLD,
+                 fetch_details=False, edit_alerts=False):
+        if not isinstance(subscribers, SubscriberRegistry):
+            subscribers = SubscriberRegistry([{'chat_id': subscribers}])
+        self.store = store
+        self.sender = sender
+        self.subscribers = subscribers
+        self.parse_mode = parse_mode
+        self.threshold = threshold
+        self.fetch_details = fetch_details
+        self.edit_alerts = edit_alerts
+        self.edits_queued = 0
+        self.routes = {}  # chat_id -> {'posts': held posts, 'numbered': n, 'digest': bool}
+        self.holders = {}  # post_id -> number of chats still holding the post
+        self.queued = 0
+        self.sent = 0
+
+    def _route(self, chat_id):
+        route = self.routes.get(chat_id)
+        if route is None:
+            route = self.routes[chat_id] = {'posts': [], 'numbered': 0, 'digest': False}
+        return route
+
+    def add(self, posts, new_posts, updated_posts=()):
+        """Take one page: its posts and the ones diff_pages found new or updated"""
+        for post in new_posts:
+            chat_ids = self.subscribers.match(post)
+            for chat_id in chat_ids:
+                self._route(chat_id)['posts'].append(post)
+            if chat_ids:
+                self.holders[get_post_id(post)] = len(chat_ids)
+        edited = self._edit_messages(updated_posts)
+        skip = set(self.holders).union(get_post_id(post) for post in edited[1])
+        known = [post for post in posts if get_post_id(post) not in skip]
+        if known:
+            self.store.add_posts(known)
+        if edited[0]:
+            self._queue(*edited)
+
+        messages = []
+        released = []
+        for chat_id, route in self.routes.items():
+            if not route['digest'] and len(route['posts']) > self.threshold:
+                chat = f" for chat {chat_id}" if len(self.subscribers) > 1 else ""
+                log(f"📰 More than {self.threshold} new posts{chat} - sending digests as they fill")
+                route['digest'] = True
+            if route['digest']:
+                chunks = split_digests(route['posts'], self.parse_mode, start=route['numbered'] + 1)
+                # The last digest can still take more posts
+                self._digest_messages(chat_id, route, chunks[:-1], messages, released)
+        if messages:
+            self._queue(messages, released)
+
+    def close(self, high_water_id=None):
+        """Send whatever is still held back; returns the number of messages sent"""
+        messages = []
+        released = []
+        for chat_id, route in self.routes.items():
+            if not route['posts']:
+                continue
+            if route['digest']:
+                chunks = split_digests(route['posts'], self.parse_mode, start=route['numbered'] + 1)
+                self._digest_messages(chat_id, route, chunks, messages, released)
+                continue
+            # Queue in reverse order so last post gets #1
+            for i, post in enumerate(reversed(route['posts']), 1):
+                log(f"📝 Queueing #{i}: {post['title']}", verbose=True)
+                messages.append({
+                    "post_id": get_post_id(post),
+                    "chat_id": chat_id,
+                    "text": format_alert(post, i, self.parse_mode),
+                    "parse_mode": self.parse_mode
+                })
+            released.extend(self._release(route, len(route['posts'])))
+
+        if messages:
+            self._queue(messages, released, high_water_id)
+        elif high_water_id:
+            self.store.set_high_water(high_water_id)
+        return self.sent
+
+    def _digest_messages(self, chat_id, route, chunks, messages, released):
+        """Add one message per chunk to messages, and the posts no chat still holds to released"""
+        if not chunks:
+            return
+        for chunk in chunks:
+            messages.append({
+                "post_id": None,
+                "chat_id": chat_id,
+                "text": render_digest(chunk, self.parse_mode),
+                "parse_mode": self.parse_mode
+            })
+        taken = sum(len(chunk) for chunk in chunks)
+        route['numbered'] += taken
+        released.extend(self._release(route, taken))
+
+    def _release(self, route, taken):
+        """Drop a chat's first `taken` posts; returns those no other chat holds"""
+        released = []
+        for post in route['posts'][:taken]:
+            post_id = get_post_id(post)
+            self.holders[post_id] -= 1
+            if not self.holders[post_id]:
+                del self.holders[post_id]
+                released.append(post)
+        del route['posts'][:taken]
+        return released
+
+    def _edit_messages(self, updated_posts):
+        """(messages, posts) for the updated posts that get an alert; the rest are just recorded"""
+        if not self.edit_alerts or not updated_posts:
+            return [], []
+        room = max(0, self.threshold - self.edits_queued)
+        if len(updated_posts) > room:
+            log(f"✏️ {len(updated_posts) - room} more edited posts recorded without alerts")
+        messages = []
+        edited = []
+        for post in updated_posts[:room]:
+            chat_ids = self.subscribers.match(post)
+            if not chat_ids:
+                continue
+            log(f"✏️ Edited: {post['title']}", verbose=True)
+            text = format_edit_alert(post, self.store.get(get_post_id(post)), self.parse_mode)
+            messages.extend(
+                {"post_id": get_post_id(post), "chat_id": chat_id, "text": text, "parse_mode": self.parse_mode}
+                for chat_id in chat_ids
+            )
+            edited.append(post)
+        self.edits_queued += len(edited)
+        return messages, edited
+
+    @timed("notify")
+    def _queue(self, messages, posts, high_water_id=None):
+        # Posts are marked seen in the same transaction, so a crash after this
+        # point resumes from the outbox instead of re-announcing them
+        added = self.store.enqueue(messages, posts, high_water_id)
+        log(f"💾 Stored {added} new posts, queued {len(messages)} notifications")
+        self.queued += len(messages)
+        self.sent += drain_outbox(self.store, self.sender)
+        if self.fetch_details:
+            # After the alerts, so review downloads never delay them
+            fetch_post_contents(posts, self.store)
+
+
+def _checkpoint_pages(waiting, notifier, checkpoint):
+    """Pass pages to checkpoint in order once the notifier holds none of their posts"""
+    while waiting and not waiting[0][2].intersection(notifier.holders):
+        page, posts, _ = waiting.popleft()
+        checkpoint(page, posts)
+
+
+@timed("pipeline")
+def run_pipeline(pages, store, notifier, reseed=False, high_water_page=None, checkpoint=None, history=None):
+    """Drive a crawl through diffing and notification; returns a summary dict.
+
+    The first post of high_water_page becomes the store's high-water mark
+    once everything before it has been recorded. checkpoint(page, posts) is
+    called in page order for every page whose posts are all recorded,
+    including new ones the notifier was holding back for a digest. Every
+    crawled page also goes to history (a HistoryWriter), if given.
+
+    If the crawl raises FetchError, what was crawled is still recorded and
+    sent, summary['stopped'] holds the failure's kind and neither the
+    high-water mark nor a reseed is finished, since the pages past the
+    failure were never seen.
+    """
+    summary = {'pages': 0, 'posts': 0, 'new': 0, 'updated': 0, 'sent': 0, 'high_water_id': None,
+               'stopped': None}
+    waiting = deque()
+    try:
+        for page, posts, new_posts, updated_posts in diff_pages(pages, store, reseed):
+            summary['pages'] += 1
+            summary['posts'] += len(posts)
+            summary['new'] += len(new_posts)
+            summary['updated'] += len(updated_posts)
+            if page == high_water_page:
+                summary['high_water_id'] = get_post_id(posts[0])
+            notifier.add(posts, new_posts, updated_posts)
+            if history:
+                history.add(page, posts)
+            if checkpoint:
+                waiting.append((page, posts, {get_post_id(post) for post in new_posts}))
+                _checkpoint_pages(waiting, notifier, checkpoint)
+    except FetchError as e:
+        summary['stopped'] = e.kind
+        count('crawls_stopped')
+        log(f"⛔ Crawl stopped after {summary['pages']} pages: {e} - the rest is left for the next run")
+
+    summary['sent'] = notifier.close(None if summary['stopped'] else summary['high_water_id'])
+    if history:
+        history.flush()
+    if checkpoint:
+        _checkpoint_pages(waiting, notifier, checkpoint)
+    if reseed and summary['posts'] and not summary['stopped']:
+        store.finish_reseed()
+    return summary
@@ -0,0 +1,62 @@
+"""Search stored reviews from the command line.
+
+    python -m dm_scraper.search "backend developer" [--limit 10] [--db seen_posts.db]
+
+Queries use FTS5 syntax: plain words must all match, and OR, NOT,
+"exact phrases", prefix* and column filters such as company:brain work too.
+"""
+import argparse
+import datetime
+import sqlite3
+import sys
+import time
+
+from .store import STORE_FILE, SeenStore
+
+
+def format_hit(number, hit):
+    badges = ", ".join(hit['badges']) if hit['badges'] else "No badges"
+    first_seen = datetime.datetime.fromtimestamp(hit['first_seen']).strftime('%Y-%m-%d')
+    lines = [
+        f"{number}. {hit['title']}  ({hit['score']:.2f})",
+        f"   🏢 {hit['company']} · 💼 {hit['role']} · 🏷️ {badges} · 📅 {first_seen}",
+        f"   🔗 {hit['link']}",
+    ]
+    if hit['snippet']:
+        lines.append(f"   {hit['snippet']}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('query', nargs='+', help="search terms")
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--db', default=STORE_FILE, help="store to search (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    # Read-only: a search never migrates, compacts or otherwise rewrites the store
+    try:
+        store = SeenStore(args.db, legacy_file=None, read_only=True)
+    except sqlite3.Error as e:
+        print(f"❌ Could not open {args.db}: {e}")
+        return 1
+    try:
+        if not store.search_enabled:
+            print("❌ No full-text index to search (no content file, or SQLite without FTS5)")
+            return 1
+        started = time.perf_counter()
+        hits = store.search(" ".join(args.query), args.limit)
+        elapsed = time.perf_counter() - started
+        total = len(store)
+    finally:
+        store.close()
+
+    for number, hit in enumerate(hits, 1):
+        print(format_hit(number, hit))
+        print()
+    print(f"🔎 {len(hits)} hits from {total} posts in {elapsed * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""Compact "seen?" index over the store's post IDs, for very large histories.
+
+Optional (SEEN_INDEX_FILE). The file holds a Bloom filter and the sorted
+64-bit hashes of every post ID, 8 bytes a post plus about 10 bits of
+filter at the default 1% false-positive rate. It is memory-mapped, so
+opening it costs a header read however many posts it covers:
+
+    header | Bloom filter bits | sorted uint64 ID hashes
+
+A lookup tests the filter and, on a hit, binary searches the hashes. A
+miss in either is definite: the post was never stored. A hit is only
+probable (two IDs can share a hash, and a post may have been deleted
+since the build), so SeenStore confirms hits with its exact SQLite
+lookup and the index never turns a new post into a known one.
+
+Posts stored after the build (rowid past the one recorded in the file)
+are kept in a small in-memory set. The store rebuilds the file when that
+set grows past REBUILD_RATIO of the index, and forgets it whenever rowids
+or IDs may have changed under it (VACUUM, ID migration); a token in the
+store's meta table and in the file header ties the two together.
+"""
+import hashlib
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+import uuid
+from array import array
+from bisect import bisect_left
+
+from .util import log
+
+SEEN_INDEX_FILE = os.getenv("SEEN_INDEX_FILE", "")  # Empty: no index, every lookup goes to SQLite
+SEEN_INDEX_FP_RATE = float(os.getenv("SEEN_INDEX_FP_RATE", "0.01"))  # Bloom filter false-positive rate
+REBUILD_RATIO = 0.05  # rebuild once posts stored after the build exceed this share of the index
+
+MAGIC = b'DMSEEN01'
+HEADER = struct.Struct('<8s16sQQQq')  # magic, token, posts, filter bits, hashes per key, built rowid
+
+
+def id_hash(post_id):
+    """64-bit hash of a post ID, as stored in the index"""
+    return int.from_bytes(hashlib.blake2b(post_id.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def bloom_size(n, fp_rate):
+    """(filter bits, hashes per key) for n keys at fp_rate, bits rounded up to whole uint64 words"""
+    n = max(n, 1)
+    bits = max(64, math.ceil(-n * math.log(fp_rate) / math.log(2) ** 2))
+    bits = -(-bits // 64) * 64
+    hashes = max(1, round(-math.log2(fp_rate)))
+    return bits, hashes
+
+
+def _positions(key, bits, hashes):
+    # Double hashing: the two 32-bit halves of the key drive every probe
+    low = key & 0xFFFFFFFF
+    high = (key >> 32) | 1
+    return [(low + i * high) % bits for i in range(hashes)]
+
+
+class SeenIndex:
+    """Read-only view of an index file, plus the posts stored since it was built"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # an empty file cannot be mapped
+            self._file.close()
+            raise ValueError(f"{path} is empty")
+        header = HEADER.unpack_from(self._map, 0)
+        magic, token, posts, bits, hashes, built_rowid = header
+        size = HEADER.size + bits // 8 + posts * 8
+        if magic != MAGIC or len(self._map) != size:
+            self.close()
+            raise ValueError(f"{path} is not a seen index or is truncated")
+        self.token = token.hex()
+        self.posts = posts
+        self.bits = bits
+        self.hashes = hashes
+        self.built_rowid = built_rowid
+        view = memoryview(self._map)
+        self._filter = view[HEADER.size:HEADER.size + bits // 8]
+        self._keys = view[HEADER.size + bits // 8:].cast('Q')
+        self.recent = set()  # hashes of posts stored after the build
+
+    def __len__(self):
+        return self.posts + len(self.recent)
+
+    def may_contain(self, post_id):
+        """False if the post was certainly never stored; True if it probably was"""
+        key = id_hash(post_id)
+        if key in self.recent:
+            return True
+        if not self.in_filter(key):
+            return False
+        keys = self._keys
+        i = bisect_left(keys, key)
+        return i < len(keys) and keys[i] == key
+
+    def in_filter(self, key):
+        """Bloom filter test for an ID hash; wrong on about SEEN_INDEX_FP_RATE of unknown keys"""
+        bloom = self._filter
+        bits = self.bits
+        position = key & 0xFFFFFFFF
+        step = (key >> 32) | 1
+        # Most unknown keys fail on the first probe or two
+        for _ in range(self.hashes):
+            position %= bits
+            if not bloom[position >> 3] & (1 << (position & 7)):
+                return False
+            position += step
+        return True
+
+    def add(self, post_ids):
+        """Record posts stored since the build"""
+        self.recent.update(id_hash(post_id) for post_id in post_ids)
+
+    def stale(self):
+        return len(self.recent) > max(1000, self.posts * REBUILD_RATIO)
+
+    def close(self):
+        # The views must go before the map they point into
+        self._filter = self._keys = None
+        self._map.close()
+        self._file.close()
+
+
+def build_index(path, post_ids, built_rowid, fp_rate=SEEN_INDEX_FP_RATE):
+    """Write an index over post_ids to path; returns its token"""
+    if sys.byteorder != 'little':
+        raise ValueError("the seen index file format is little-endian")
+    started = time.perf_counter()
+    keys = array('Q', sorted({id_hash(post_id) for post_id in post_ids}))
+    bits, hashes = bloom_size(len(keys), fp_rate)
+    bloom = bytearray(bits // 8)
+    for key in keys:
+        for position in _positions(key, bits, hashes):
+            bloom[position >> 3] |= 1 << (position & 7)
+
+    token = uuid.uuid4().bytes
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, token, len(keys), bits, hashes, built_rowid))
+        f.write(bloom)
+        keys.tofile(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    log(f"🗂️ Built seen index {path}: {len(keys)} posts, {os.path.getsize(path) / 1024:.0f} KiB, "
+        f"{hashes} hashes at {fp_rate:.2%} false positives in {time.perf_counter() - started:.2f}s")
+    return token.hex()
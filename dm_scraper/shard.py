@@ -0,0 +1,301 @@
+"""Sharded archive crawl: several processes split the pages through leases.
+
+A shard board is a SQLite file (SHARD_DB) that every worker opens, on one
+host or on a filesystem the runners share (NFS, SMB). It uses a rollback
+journal and plain file locks rather than WAL, whose shared-memory index
+only works on one host; every write takes the lock up front with BEGIN
+IMMEDIATE, so two workers never claim the same shard. The crawl's page
+range is cut into shards of SHARD_SIZE pages; a worker claims the first open shard
+with a lease of SHARD_LEASE seconds, renews it with every page it saves
+and marks the shard done at the end. The lease of a worker that crashed
+runs out and the next worker to look for work takes the shard over, so
+the crawl finishes as long as one worker is alive. Saving a page twice is
+harmless.
+
+Pages are stored with their posts as they are crawled. iter_sharded_pages()
+reads them back in website order - crawling shards itself whenever the
+next page is not there yet - so the usual pipeline diffs and notifies a
+sharded crawl exactly like a local one.
+
+    python -m dm_scraper.shard work      # one more worker for the current crawl
+    python -m dm_scraper.shard status
+"""
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from .fetch import FetchError
+from .parse import Post
+from .util import log
+
+SHARD_SIZE = int(os.getenv("SHARD_SIZE", "25"))  # pages per shard
+SHARD_LEASE = float(os.getenv("SHARD_LEASE", "300"))  # seconds a claim lasts without progress
+SHARD_POLL = float(os.getenv("SHARD_POLL", "2"))  # seconds between checks while others hold every shard
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawls (
+    crawl TEXT PRIMARY KEY,
+    last_page INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shards (
+    crawl TEXT NOT NULL,
+    first_page INTEGER NOT NULL,
+    last_page INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'open',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (crawl, first_page)
+);
+CREATE TABLE IF NOT EXISTS shard_pages (
+    crawl TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    posts TEXT NOT NULL,
+    worker TEXT NOT NULL,
+    PRIMARY KEY (crawl, page)
+);
+"""
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class ShardBoard:
+    """Shards, leases and crawled pages of sharded crawls in a shared SQLite file"""
+
+    def __init__(self, path, lease_seconds=SHARD_LEASE):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        # Autocommit; writes take the database lock up front with BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        # Not WAL: its shared-memory index does not work across hosts. PERSIST
+        # is the rollback journal without creating and deleting the journal
+        # file on every commit (every saved page is one)
+        self.conn.execute("PRAGMA journal_mode=PERSIST")
+        self.conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def plan(self, crawl, first_page, last_page, shard_size=SHARD_SIZE):
+        """Cut first_page..last_page into shards unless another worker already has"""
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM crawls WHERE crawl = ?", (crawl,)).fetchone():
+                return False
+            conn.execute("INSERT INTO crawls (crawl, last_page, created) VALUES (?, ?, ?)",
+                         (crawl, last_page, time.time()))
+            conn.executemany(
+                "INSERT INTO shards (crawl, first_page, last_page) VALUES (?, ?, ?)",
+                [
+                    (crawl, start, min(start + shard_size - 1, last_page))
+                    for start in range(first_page, last_page + 1, shard_size)
+                ]
+            )
+        log(f"🧩 Planned {crawl}: pages {first_page}-{last_page} in shards of {shard_size}")
+        return True
+
+    def is_planned(self, crawl):
+        return self.last_page(crawl) is not None
+
+    def last_page(self, crawl):
+        with self._lock:
+            row = self.conn.execute("SELECT last_page FROM crawls WHERE crawl = ?", (crawl,)).fetchone()
+        return row[0] if row else None
+
+    def claim(self, crawl, worker):
+        """Lease the first open or expired shard; returns (first_page, last_page) or None"""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT first_page, last_page, status, worker FROM shards "
+                "WHERE crawl = ? AND first_page <= (SELECT last_page FROM crawls WHERE crawl = ?) "
+                "AND (status = 'open' OR (status = 'leased' AND lease_until < ?)) "
+                "ORDER BY first_page LIMIT 1",
+                (crawl, crawl, now)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE shards SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1 "
+                "WHERE crawl = ? AND first_page = ?",
+                (worker, now + self.lease_seconds, crawl, row[0])
+            )
+        if row[2] == 'leased':
+            log(f"♻️ Reclaimed pages {row[0]}-{row[1]} from {row[3]} (lease expired)")
+        return row[0], row[1]
+
+    def save_page(self, crawl, shard, page, posts, worker):
+        """Store a crawled page and renew the lease; False once the lease is lost"""
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO shard_pages (crawl, page, posts, worker) VALUES (?, ?, ?, ?)",
+                (crawl, page, json.dumps([post.to_row() for post in posts], ensure_ascii=False), worker)
+            )
+            if not posts:
+                # The end of the site: shards past it are never handed out
+                conn.execute("UPDATE crawls SET last_page = MIN(last_page, ?) WHERE crawl = ?",
+                             (page - 1, crawl))
+            renewed = conn.execute(
+                "UPDATE shards SET lease_until = ? "
+                "WHERE crawl = ? AND first_page = ? AND worker = ? AND status = 'leased'",
+                (time.time() + self.lease_seconds, crawl, shard[0], worker)
+            ).rowcount
+        return renewed == 1
+
+    def release(self, crawl, shard, worker):
+        """Hand a shard back unfinished; the pages saved so far are kept"""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE shards SET status = 'open', worker = NULL, lease_until = NULL "
+                "WHERE crawl = ? AND first_page = ? AND worker = ? AND status = 'leased'",
+                (crawl, shard[0], worker)
+            )
+
+    def complete(self, crawl, shard, worker):
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE shards SET status = 'done', lease_until = NULL "
+                "WHERE crawl = ? AND first_page = ? AND worker = ?",
+                (crawl, shard[0], worker)
+            )
+
+    def remaining(self, crawl):
+        """Shards of the crawl not done yet (those past the end of the site do not count)"""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM shards WHERE crawl = ? AND status != 'done' "
+                "AND first_page <= (SELECT last_page FROM crawls WHERE crawl = ?)",
+                (crawl, crawl)
+            ).fetchone()[0]
+
+    def get_page(self, crawl, page):
+        """Posts saved for a page ([] marks the end of the site), or None if not crawled yet"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT posts FROM shard_pages WHERE crawl = ? AND page = ?", (crawl, page)
+            ).fetchone()
+        return [Post.from_row(post) for post in json.loads(row[0])] if row else None
+
+    def status(self):
+        with self._lock:
+            return self.conn.execute(
+                "SELECT s.crawl, c.last_page, "
+                "SUM(s.status = 'done'), SUM(s.status = 'leased'), SUM(s.status = 'open'), "
+                "(SELECT COUNT(*) FROM shard_pages p WHERE p.crawl = s.crawl) "
+                "FROM shards s JOIN crawls c ON c.crawl = s.crawl GROUP BY s.crawl"
+            ).fetchall()
+
+    def finish_crawl(self, crawl):
+        """Drop a merged crawl so the next one is planned afresh"""
+        with self._transaction() as conn:
+            for table in ('shard_pages', 'shards', 'crawls'):
+                conn.execute(f"DELETE FROM {table} WHERE crawl = ?", (crawl,))
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def crawl_shard(board, crawl, get_posts, page_url, worker):
+    """Claim one shard and crawl it; returns False if there was nothing to claim.
+
+    A page that cannot be fetched hands the shard back and raises FetchError.
+    """
+    shard = board.claim(crawl, worker)
+    if shard is None:
+        return False
+    first_page, last_page = shard
+    log(f"🧩 {worker} crawling pages {first_page}-{last_page}", verbose=True)
+    for page in range(first_page, last_page + 1):
+        try:
+            posts = get_posts(page_url(page))
+        except FetchError:
+            board.release(crawl, shard, worker)
+            raise
+        if not board.save_page(crawl, shard, page, posts, worker):
+            log(f"⚠️ Lost the lease on pages {first_page}-{last_page} - leaving them to its new holder")
+            return True
+        if not posts:
+            log(f"No more pages found after page {page - 1}")
+            break
+    board.complete(crawl, shard, worker)
+    return True
+
+
+def work(board, crawl, get_posts, page_url, worker=None):
+    """Crawl shards until none is left; returns the number of shards crawled"""
+    worker = worker or worker_id()
+    crawled = 0
+    while board.remaining(crawl):
+        if crawl_shard(board, crawl, get_posts, page_url, worker):
+            crawled += 1
+        else:
+            # Everything left is leased; wait for it to finish or expire
+            time.sleep(SHARD_POLL)
+    return crawled
+
+
+def iter_sharded_pages(board, crawl, get_posts, page_url, start_page, worker=None):
+    """Yield (page, posts) of a planned crawl in website order.
+
+    Pages other workers have saved are read back; when the next page is
+    missing this process claims and crawls a shard itself, or waits while
+    every remaining shard is leased.
+    """
+    worker = worker or worker_id()
+    page = start_page
+    while page <= board.last_page(crawl):
+        posts = board.get_page(crawl, page)
+        if posts is None:
+            if not crawl_shard(board, crawl, get_posts, page_url, worker):
+                time.sleep(SHARD_POLL)
+            continue
+        if not posts:
+            break
+        yield page, posts
+        page += 1
+
+
+def main(argv=None):
+    import argparse
+
+    from .archive import run_shard_worker
+    from .config import Config
+
+    parser = argparse.ArgumentParser(prog="python -m dm_scraper.shard", description="Sharded archive crawl")
+    parser.add_argument('command', choices=('work', 'status'))
+    args = parser.parse_args(argv)
+    config = Config()
+    if not config.shard_db:
+        parser.error("set SHARD_DB to the shared shard board file")
+
+    if args.command == 'work':
+        run_shard_worker(config)
+        return 0
+
+    board = ShardBoard(config.shard_db)
+    for crawl, last_page, done, leased, open_shards, pages in board.status():
+        print(f"{crawl}: last page {last_page}, shards {done} done / {leased} leased / {open_shards} open, "
+              f"{pages} pages saved")
+    board.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
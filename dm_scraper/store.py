@@ -0,0 +1,817 @@
+"""SQLite store of every post ever seen, keyed by post ID.
+
+Replaces the 150-post seen_posts.json buffer. Lookups are single indexed
+queries, new posts are inserted incrementally instead of rewriting the whole
+file, and history is unbounded without holding it in memory. An existing
+seen_posts.json is imported the first time the store is opened.
+
+The same database holds the notification outbox. New posts are recorded and
+their messages queued in one transaction, and each message is marked sent
+as soon as Telegram accepts it, so an interrupted run neither loses nor
+repeats notifications. Long archive crawls checkpoint every completed page
+(crawl_pages) so an interrupted one resumes after the last of them.
+
+Posts are keyed by the story number in their link, so an edited title
+keeps its ID, and carry a 64-bit fingerprint of the listing fields. Stores
+keyed by the older title_link IDs are rewritten the first time they are
+opened.
+
+Posts and cached review bodies are also indexed for full-text search with
+FTS5 as they are stored; see SeenStore.search and dm_scraper.search.
+
+The workflows commit the store to git after every run, so it only holds
+what the next run needs and only changes when something did: posts,
+pending messages, checkpoints and meta. A known post is rewritten only when
+its listing fields change (last_seen is when that last happened; with
+HISTORY_DIR set, every sighting is in the history export). Review bodies, the search index and
+the log of sent messages are bulky and can be rebuilt or lost without
+harm, so they live in a second file next to the store
+(seen_posts-content.db), attached to the same connection and kept in the
+Actions cache instead of the repository. Stores that still hold those
+tables have them moved out on open.
+
+With SEEN_INDEX_FILE set (off by default), membership checks first go
+through a compact Bloom filter and sorted-hash index
+(dm_scraper.seenindex), so posts that were never stored are ruled out
+without a B-tree lookup. It stays off the write path: lookups pick up the
+posts stored since its last sync by rowid first.
+
+Durability: the database runs in WAL mode with synchronous=FULL, so each
+run appends only its changes to the write-ahead log and every commit is
+fsync'd. close() checkpoints the log back into the main file (which is what
+the workflows commit) and VACUUMs when enough space is free. A store that
+fails its integrity check is moved aside, whatever posts can still be read
+are copied into a fresh one, and the next crawl is recorded without alerts
+instead of re-announcing everything. A damaged content file is simply
+started again. A store opened with read_only=True (the search CLI) is
+never written: no schema changes, migrations, recovery or compaction.
+"""
+import hashlib
+import json
+import os
+import pathlib
+import re
+import sqlite3
+import threading
+import time
+import uuid
+
+from .metrics import count, phase
+from .seenindex import SEEN_INDEX_FILE, SeenIndex, build_index
+from .util import log
+
+STORE_FILE = os.getenv("STORE_FILE", "seen_posts.db")
+LEGACY_STATE_FILE = "seen_posts.json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id TEXT PRIMARY KEY,
+    title TEXT,
+    link TEXT,
+    company TEXT,
+    role TEXT,
+    badges TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    fingerprint INTEGER
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    post_id TEXT,
+    chat_id TEXT NOT NULL,
+    text TEXT NOT NULL,
+    parse_mode TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    sent_at REAL,
+    last_attempt_run TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_status ON outbox (status, id);
+CREATE TABLE IF NOT EXISTS crawl_pages (
+    crawl TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    post_ids TEXT NOT NULL,
+    completed REAL NOT NULL,
+    PRIMARY KEY (crawl, page)
+);
+"""
+
+# Tables of the content file, attached as "content". Unqualified names in
+# queries and triggers find them there, since the store itself has none.
+CONTENT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS content.post_content (
+    post_id TEXT PRIMARY KEY,
+    content TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS content.sent_messages (
+    id INTEGER PRIMARY KEY,
+    post_id TEXT,
+    chat_id TEXT NOT NULL,
+    text TEXT NOT NULL,
+    parse_mode TEXT,
+    attempts INTEGER NOT NULL,
+    created REAL NOT NULL,
+    sent_at REAL NOT NULL
+);
+"""
+# Tables and triggers that older stores kept in the committed file
+LEGACY_CONTENT_TABLES = ('post_content', 'post_search', 'search_docs')
+LEGACY_TRIGGERS = ('posts_search_insert', 'posts_search_update', 'post_content_search')
+
+# Full-text index over posts and review bodies, kept up to date by triggers so
+# every write path indexes incrementally. search_docs gives each post a
+# stable integer rowid in post_search (VACUUM may renumber implicit rowids).
+# The triggers span both files, which only TEMP triggers may do, so they are
+# created again on every connection.
+SEARCH_SCHEMA = """
+CREATE TABLE IF NOT EXISTS content.search_docs (
+    doc INTEGER PRIMARY KEY,
+    post_id TEXT NOT NULL UNIQUE
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS content.post_search USING fts5(
+    title, company, role, badges, body,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TEMP TRIGGER IF NOT EXISTS posts_search_insert AFTER INSERT ON main.posts BEGIN
+    INSERT OR IGNORE INTO search_docs (post_id) VALUES (new.id);
+    INSERT INTO post_search (rowid, title, company, role, badges, body) VALUES (
+        (SELECT doc FROM search_docs WHERE post_id = new.id),
+        new.title, new.company, new.role, new.badges,
+        (SELECT content FROM post_content WHERE post_id = new.id)
+    );
+END;
+CREATE TEMP TRIGGER IF NOT EXISTS posts_search_update AFTER UPDATE OF title, company, role, badges ON main.posts BEGIN
+    UPDATE post_search SET title = new.title, company = new.company, role = new.role, badges = new.badges
+    WHERE rowid = (SELECT doc FROM search_docs WHERE post_id = new.id);
+END;
+CREATE TEMP TRIGGER IF NOT EXISTS post_content_search AFTER INSERT ON content.post_content BEGIN
+    UPDATE post_search SET body = new.content
+    WHERE rowid = (SELECT doc FROM search_docs WHERE post_id = new.post_id);
+END;
+"""
+# Relative weight of each column in the ranking
+SEARCH_WEIGHTS = (5.0, 3.0, 2.0, 1.0, 1.0)
+
+COMPACT_FREE_RATIO = 0.25  # VACUUM on close once this share of pages is free
+SALVAGE_BATCH = 200  # rows read at a time when salvaging a corrupt store
+
+ID_SCHEME = 'story'  # meta value once every post is keyed by its story number
+STORY_ID_RE = re.compile(r'/story/(\d+)')
+
+MAX_SEND_ATTEMPTS = 3  # runs a message is retried in before it is marked failed
+SENT_RETENTION = 7 * 24 * 3600  # seconds sent messages are kept for auditing
+
+
+def content_file(path):
+    """The content file kept next to a store: seen_posts.db -> seen_posts-content.db"""
+    if path == ':memory:':
+        return path
+    return f"{os.path.splitext(path)[0]}-content.db"
+
+
+def canonical_post_id(link):
+    """Story number from a post link ('/story/9000/some-slug' -> '9000'), or None"""
+    match = STORY_ID_RE.search(link or '')
+    return match.group(1) if match else None
+
+
+def get_post_id(post):
+    # The story number survives title and slug edits; the link is the
+    # fallback for posts that do not have one
+    link = post.get('link')
+    return canonical_post_id(link) or link or post.get('id', f"{post.get('title', '')}_{link}")
+
+
+def post_fingerprint(post):
+    """64-bit hash of the listing fields an author can edit, as a signed SQLite integer"""
+    fields = [post.get('title'), post.get('company'), post.get('role'), *(post.get('badges') or [])]
+    data = "\x1f".join(field or '' for field in fields).encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big', signed=True)
+
+
+def _row_to_post(row):
+    return {
+        "id": row[0],
+        "title": row[1],
+        "link": row[2],
+        "company": row[3],
+        "role": row[4],
+        "badges": json.loads(row[5]) if row[5] else [],
+        "first_seen": row[6],
+        "last_seen": row[7]
+    }
+
+
+def _readable_posts(rows):
+    posts = []
+    for row in rows:
+        try:
+            posts.append(_row_to_post(row))
+        except (ValueError, TypeError):
+            continue
+    return posts
+
+
+def _salvage_posts(path):
+    """Read every posts row that is still readable from a damaged database"""
+    posts = []
+    try:
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode")
+    except sqlite3.DatabaseError as e:
+        log(f"⚠️ Nothing could be read from {path}: {e}")
+        return posts
+
+    try:
+        try:
+            return _readable_posts(conn.execute("SELECT * FROM posts").fetchall())
+        except sqlite3.DatabaseError:
+            pass
+
+        # Read in small rowid ranges so one bad page only loses its own rows
+        try:
+            last = conn.execute("SELECT MAX(rowid) FROM posts").fetchone()[0] or 0
+        except sqlite3.DatabaseError as e:
+            log(f"⚠️ Nothing could be read from {path}: {e}")
+            return posts
+        for start in range(0, last + 1, SALVAGE_BATCH):
+            try:
+                rows = conn.execute(
+                    "SELECT * FROM posts WHERE rowid >= ? AND rowid < ?",
+                    (start, start + SALVAGE_BATCH)
+                ).fetchall()
+            except sqlite3.DatabaseError:
+                continue
+            posts.extend(_readable_posts(rows))
+        return posts
+    finally:
+        conn.close()
+
+
+class SeenStore:
+    """Indexed set of seen posts; supports `post_id in store` and len(store)"""
+
+    def __init__(self, path=STORE_FILE, legacy_file=LEGACY_STATE_FILE, index_file=SEEN_INDEX_FILE,
+                 read_only=False):
+        self.path = path
+        self.content_path = content_file(path)
+        self.read_only = read_only
+        self.start_run()
+        self.index = None
+        self._lock = threading.Lock()
+        if read_only:
+            self.conn = self._open_read_only()
+            self.search_enabled = self._has_search_index()
+            return
+        try:
+            self.conn = self._open()
+        except sqlite3.DatabaseError as e:
+            self.conn = self._recover(e)
+        self.search_enabled = self._create_search_index()
+        if self.get_meta('id_scheme') != ID_SCHEME:
+            self._migrate_ids()
+        if legacy_file and self.get_meta('migrated_from') is None:
+            self._migrate_json(legacy_file)
+        if index_file:
+            self._open_index(index_file)
+
+    def _open_index(self, index_file):
+        """Map the seen index, rebuilding it if it was built for another state of the store"""
+        try:
+            index = SeenIndex(index_file)
+        except (OSError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                log(f"⚠️ Rebuilding unreadable seen index: {e}")
+            index = None
+        if index is not None and index.token != self.get_meta('seen_index'):
+            log(f"🗂️ {index_file} does not match {self.path} - rebuilding it")
+            index.close()
+            index = None
+        if index is None:
+            self._build_index(index_file)
+            index = SeenIndex(index_file)
+        self._index_rowid = index.built_rowid
+        self.index = index
+        self._sync_index()
+
+    def _sync_index(self):
+        """Add the posts stored since the last sync to the seen index"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT rowid, id FROM posts WHERE rowid > ? ORDER BY rowid", (self._index_rowid,)
+            ).fetchall()
+        if rows:
+            self.index.add(row[1] for row in rows)
+            self._index_rowid = rows[-1][0]
+
+    def _build_index(self, index_file):
+        with self._lock:
+            built_rowid = self.conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM posts").fetchone()[0]
+            post_ids = [row[0] for row in self.conn.execute("SELECT id FROM posts")]
+        token = build_index(index_file, post_ids, built_rowid)
+        self.set_meta('seen_index', token)
+
+    def _confirmed(self, post_ids):
+        """post_ids minus those the seen index rules out"""
+        self._sync_index()
+        candidates = [post_id for post_id in post_ids if self.index.may_contain(post_id)]
+        count('seen_index_negatives', len(post_ids) - len(candidates))
+        return candidates
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            result = conn.execute("PRAGMA quick_check").fetchone()[0]
+            if result != 'ok':
+                raise sqlite3.DatabaseError(f"integrity check failed: {result}")
+            conn.executescript(SCHEMA)
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(posts)")]
+            if 'fingerprint' not in columns:
+                conn.execute("ALTER TABLE posts ADD COLUMN fingerprint INTEGER")
+            if 'last_attempt_run' not in [row[1] for row in conn.execute("PRAGMA table_info(outbox)")]:
+                conn.execute("ALTER TABLE outbox ADD COLUMN last_attempt_run TEXT")
+            conn.commit()
+            self._attach_content(conn)
+        except sqlite3.DatabaseError:
+            conn.close()
+            raise
+        return conn
+
+    def _open_read_only(self):
+        """Connection that can only read the store and, if it exists, the content file"""
+        conn = sqlite3.connect(pathlib.Path(self.path).resolve().as_uri() + "?mode=ro", uri=True,
+                               check_same_thread=False)
+        try:
+            conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            if os.path.exists(self.content_path):
+                conn.execute("ATTACH DATABASE ? AS content",
+                             (pathlib.Path(self.content_path).resolve().as_uri() + "?mode=ro",))
+        except sqlite3.DatabaseError:
+            conn.close()
+            raise
+        return conn
+
+    def _has_search_index(self):
+        try:
+            self.conn.execute("SELECT 1 FROM post_search LIMIT 1").fetchall()
+        except sqlite3.OperationalError:
+            return False
+        return True
+
+    def _attach_content(self, conn):
+        """Attach the content file, starting it again if it is damaged"""
+        try:
+            conn.execute("ATTACH DATABASE ? AS content", (self.content_path,))
+            conn.execute("PRAGMA content.journal_mode=WAL")
+            result = conn.execute("PRAGMA content.quick_check").fetchone()[0]
+            if result != 'ok':
+                raise sqlite3.DatabaseError(f"integrity check failed: {result}")
+        except sqlite3.DatabaseError as e:
+            log(f"⚠️ {self.content_path} is unreadable ({e}) - starting it again; bodies and search are rebuilt")
+            try:
+                conn.execute("DETACH DATABASE content")
+            except sqlite3.DatabaseError:
+                pass
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(self.content_path + suffix):
+                    os.remove(self.content_path + suffix)
+            conn.execute("ATTACH DATABASE ? AS content", (self.content_path,))
+            conn.execute("PRAGMA content.journal_mode=WAL")
+        # Bodies and the search index can be fetched and rebuilt again
+        conn.execute("PRAGMA content.synchronous=NORMAL")
+        conn.executescript(CONTENT_SCHEMA)
+        self._move_content(conn)
+
+    def _move_content(self, conn):
+        """Move review bodies, the search index and sent messages out of an older store"""
+        legacy = {row[0] for row in conn.execute(
+            "SELECT name FROM main.sqlite_master WHERE name IN ({})".format(",".join("?" * len(LEGACY_CONTENT_TABLES))),
+            LEGACY_CONTENT_TABLES
+        )}
+        sent = conn.execute("SELECT COUNT(*) FROM main.outbox WHERE status = 'sent'").fetchone()[0]
+        if not legacy and not sent:
+            return
+        with conn:
+            for trigger in LEGACY_TRIGGERS:
+                conn.execute(f"DROP TRIGGER IF EXISTS main.{trigger}")
+            if 'post_content' in legacy:
+                conn.execute("INSERT OR IGNORE INTO content.post_content SELECT post_id, content, fetched_at "
+                             "FROM main.post_content")
+            for table in LEGACY_CONTENT_TABLES:
+                if table in legacy:
+                    conn.execute(f"DROP TABLE main.{table}")
+            self._archive_sent(conn, "status = 'sent'")
+        log(f"📦 Moved review bodies, search index and {sent} sent messages to {self.content_path}")
+
+    @staticmethod
+    def _archive_sent(conn, where, params=()):
+        conn.execute(
+            "INSERT OR REPLACE INTO content.sent_messages "
+            "SELECT id, post_id, chat_id, text, parse_mode, attempts, created, sent_at FROM main.outbox "
+            f"WHERE {where}", params
+        )
+        conn.execute(f"DELETE FROM main.outbox WHERE {where}", params)
+
+    def _recover(self, error):
+        """Move a corrupt store aside and start again from whatever can be read"""
+        backup = f"{self.path}.corrupt-{int(time.time())}"
+        log(f"⚠️ {self.path} is corrupt ({error}) - moving it to {backup}")
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                os.replace(self.path + suffix, backup + suffix)
+
+        posts = _salvage_posts(backup)
+        conn = self._open()
+        self.conn = conn
+        self.add_posts(posts)
+        # Without this the next run would alert on every post it can see
+        self.set_meta('reseed', '1')
+        log(f"🩹 Salvaged {len(posts)} posts; the next crawl will be recorded without alerts")
+        return conn
+
+    def needs_reseed(self):
+        """True after a recovery: record the next crawl without alerting"""
+        return self.get_meta('reseed') == '1'
+
+    def finish_reseed(self):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM meta WHERE key = 'reseed'")
+
+    def _create_search_index(self):
+        try:
+            self.conn.executescript(SEARCH_SCHEMA)
+        except sqlite3.OperationalError as e:
+            log(f"⚠️ Full-text search disabled (SQLite without FTS5?): {e}")
+            return False
+        # Index posts stored before the index existed; a no-op afterwards
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO search_docs (post_id) SELECT id FROM posts "
+                "WHERE id NOT IN (SELECT post_id FROM search_docs)"
+            )
+            indexed = self.conn.execute(
+                "INSERT INTO post_search (rowid, title, company, role, badges, body) "
+                "SELECT d.doc, p.title, p.company, p.role, p.badges, c.content "
+                "FROM search_docs d JOIN posts p ON p.id = d.post_id "
+                "LEFT JOIN post_content c ON c.post_id = d.post_id "
+                "WHERE d.doc > (SELECT COALESCE(MAX(rowid), 0) FROM post_search)"
+            ).rowcount
+        if indexed:
+            log(f"🔎 Indexed {indexed} existing posts for full-text search")
+        return True
+
+    def _migrate_ids(self):
+        """Re-key posts stored under title_link IDs and fingerprint them.
+
+        Posts whose title was edited were stored twice under the old IDs;
+        those rows are merged, keeping the earliest first_seen and the most
+        recently seen listing fields.
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, title, link, company, role, badges, first_seen, last_seen FROM posts "
+                "ORDER BY first_seen, rowid"
+            ).fetchall()
+        groups = {}
+        for row in rows:
+            groups.setdefault(get_post_id({'id': row[0], 'title': row[1], 'link': row[2]}), []).append(row)
+
+        renamed = {}
+        merged = 0
+        with phase("state_io"), self._lock, self.conn:
+            for post_id, group in groups.items():
+                keep = group[0]
+                latest = max(group, key=lambda row: row[7])
+                for row in group[1:]:
+                    self._delete_post(row[0])
+                    merged += 1
+                # Rows keyed by post ID move first, so the search trigger on
+                # the posts update below finds the kept post's index entry
+                if keep[0] != post_id:
+                    for table in ('post_content', 'search_docs', 'outbox', 'sent_messages'):
+                        self.conn.execute(f"UPDATE {table} SET post_id = ? WHERE post_id = ?", (post_id, keep[0]))
+                post = _row_to_post(latest)
+                self.conn.execute(
+                    "UPDATE posts SET id = ?, title = ?, link = ?, company = ?, role = ?, badges = ?, "
+                    "last_seen = ?, fingerprint = ? WHERE id = ?",
+                    (post_id, *latest[1:6], latest[7], post_fingerprint(post), keep[0])
+                )
+                for row in group:
+                    renamed[row[0]] = post_id
+
+            high_water = self.conn.execute("SELECT value FROM meta WHERE key = 'high_water'").fetchone()
+            if high_water and high_water[0] in renamed:
+                self.conn.execute("UPDATE meta SET value = ? WHERE key = 'high_water'", (renamed[high_water[0]],))
+            self.conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('id_scheme', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (ID_SCHEME,)
+            )
+            # Hashes of the old IDs are useless to a seen index
+            self.conn.execute("DELETE FROM meta WHERE key = 'seen_index'")
+        changed = sum(1 for old, new in renamed.items() if old != new)
+        if changed:
+            log(f"🔑 Re-keyed {changed} posts by story number ({merged} duplicates from edited titles merged)")
+
+    def _delete_post(self, post_id):
+        if self.search_enabled:
+            doc = self.conn.execute("SELECT doc FROM search_docs WHERE post_id = ?", (post_id,)).fetchone()
+            if doc:
+                self.conn.execute("DELETE FROM post_search WHERE rowid = ?", doc)
+                self.conn.execute("DELETE FROM search_docs WHERE doc = ?", doc)
+        self.conn.execute("DELETE FROM post_content WHERE post_id = ?", (post_id,))
+        self.conn.execute("DELETE FROM posts WHERE id = ?", (post_id,))
+
+    def _migrate_json(self, legacy_file):
+        try:
+            with open(legacy_file, 'r', encoding='utf-8') as f:
+                content = f.read().strip()
+            posts = json.loads(content) if content else []
+        except FileNotFoundError:
+            posts = []
+        except (json.JSONDecodeError, OSError) as e:
+            log(f"⚠️ Could not migrate {legacy_file}: {e}")
+            self.set_meta('reseed', '1')
+            posts = []
+
+        if isinstance(posts, list) and posts:
+            self.add_posts(posts)
+            # The buffer was kept in website order, newest first
+            self.set_high_water(get_post_id(posts[0]))
+            log(f"📦 Migrated {len(posts)} posts from {legacy_file} to {self.path}")
+        self.set_meta('migrated_from', legacy_file)
+
+    def __contains__(self, post_id):
+        if self.index is not None and not self._confirmed([post_id]):
+            return False
+        with self._lock:
+            row = self.conn.execute("SELECT 1 FROM posts WHERE id = ?", (post_id,)).fetchone()
+        return row is not None
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+    def get(self, post_id):
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM posts WHERE id = ?", (post_id,)).fetchone()
+        return _row_to_post(row) if row else None
+
+    def add_posts(self, posts):
+        """Insert new posts and rewrite known ones whose listing fields changed; returns the number inserted"""
+        with phase("state_io"), self._lock, self.conn:
+            return self._insert_posts(posts)
+
+    def _insert_posts(self, posts):
+        now = time.time()
+        rows = [
+            (
+                get_post_id(post),
+                post.get('title'),
+                post.get('link'),
+                post.get('company'),
+                post.get('role'),
+                json.dumps(post.get('badges') or [], ensure_ascii=False),
+                post_fingerprint(post),
+                now,
+                now
+            )
+            for post in posts
+        ]
+        # rowcount leaves out rows written by the search index triggers
+        inserted = self.conn.executemany(
+            "INSERT OR IGNORE INTO posts (id, title, link, company, role, badges, fingerprint, first_seen, last_seen) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        ).rowcount
+        count('posts_stored', inserted)
+        # Unchanged posts are left alone, so a run with nothing new leaves the
+        # committed file as it was; only edited ones are rewritten (and reindexed)
+        self.conn.executemany(
+            "UPDATE posts SET title = ?, link = ?, company = ?, role = ?, badges = ?, fingerprint = ?, last_seen = ? "
+            "WHERE id = ? AND fingerprint IS NOT ?",
+            [(*row[1:7], now, row[0], row[6]) for row in rows]
+        )
+        return inserted
+
+    def enqueue(self, messages, posts=(), high_water_id=None):
+        """Queue messages and record posts as seen in a single transaction.
+
+        messages is a list of dicts with post_id, chat_id, text and
+        parse_mode. Returns the number of posts inserted.
+        """
+        now = time.time()
+        with phase("state_io"), self._lock, self.conn:
+            inserted = self._insert_posts(posts)
+            self.conn.executemany(
+                "INSERT INTO outbox (post_id, chat_id, text, parse_mode, created) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (m.get('post_id'), str(m['chat_id']), m['text'], m.get('parse_mode'), now)
+                    for m in messages
+                ]
+            )
+            if high_water_id:
+                self.conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('high_water', ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value WHERE value IS NOT excluded.value",
+                    (high_water_id,)
+                )
+        return inserted
+
+    def start_run(self):
+        """Begin a new run for send attempts; a SeenStore starts in one of its own"""
+        self.run_id = uuid.uuid4().hex
+
+    def pending_messages(self):
+        """Queued messages in the order they were enqueued"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, post_id, chat_id, text, parse_mode, attempts, last_attempt_run FROM outbox "
+                "WHERE status = 'pending' ORDER BY id"
+            ).fetchall()
+        return [
+            {'id': r[0], 'post_id': r[1], 'chat_id': r[2], 'text': r[3], 'parse_mode': r[4], 'attempts': r[5],
+             'failed_this_run': r[6] == self.run_id}
+            for r in rows
+        ]
+
+    def pending_count(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending'").fetchone()[0]
+
+    def mark_sent(self, message_id):
+        """Move a delivered message to the sent log in the content file"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE outbox SET status = 'sent', sent_at = ?, attempts = attempts + 1 WHERE id = ?",
+                (time.time(), message_id)
+            )
+            self._archive_sent(self.conn, "id = ?", (message_id,))
+
+    def mark_attempt_failed(self, message_id):
+        """Count a failed run for the message, at most once per run; give up after MAX_SEND_ATTEMPTS"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE outbox SET attempts = attempts + 1, last_attempt_run = ?, "
+                "status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE status END "
+                "WHERE id = ? AND last_attempt_run IS NOT ?",
+                (self.run_id, MAX_SEND_ATTEMPTS, message_id, self.run_id)
+            )
+
+    def prune_outbox(self):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM sent_messages WHERE sent_at < ?",
+                (time.time() - SENT_RETENTION,)
+            )
+
+    def _lookup(self, sql, keys):
+        """Run sql ("... IN ({})") over keys in batches; returns the rows as a dict"""
+        keys = list(keys)
+        found = {}
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                found.update(self.conn.execute(sql.format(placeholders), batch).fetchall())
+        return found
+
+    def get_contents(self, post_ids):
+        """Cached review bodies for the given post IDs, as a dict"""
+        return self._lookup("SELECT post_id, content FROM post_content WHERE post_id IN ({})", post_ids)
+
+    def fingerprints(self, post_ids):
+        """{post_id: fingerprint} for the given IDs that are already stored"""
+        if self.index is None:
+            return self._lookup("SELECT id, fingerprint FROM posts WHERE id IN ({})", post_ids)
+        candidates = self._confirmed(list(post_ids))
+        found = self._lookup("SELECT id, fingerprint FROM posts WHERE id IN ({})", candidates)
+        count('seen_index_false_positives', len(candidates) - len(found))
+        return found
+
+    def first_seen(self, post_ids):
+        """{post_id: first_seen} for the given IDs that are already stored"""
+        return self._lookup("SELECT id, first_seen FROM posts WHERE id IN ({})", post_ids)
+
+    def save_content(self, post_id, content):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO post_content (post_id, content, fetched_at) VALUES (?, ?, ?)",
+                (post_id, content, time.time())
+            )
+
+    def search(self, query, limit=20):
+        """Posts matching an FTS5 query, best match first.
+
+        Plain words are ANDed; FTS5 syntax (OR, NOT, "phrases", prefix*,
+        company:name) works too. Input that is not valid FTS5 syntax is
+        searched as a list of literal words.
+        """
+        if not self.search_enabled:
+            raise RuntimeError("full-text search needs SQLite built with FTS5")
+        weights = ", ".join(str(w) for w in SEARCH_WEIGHTS)
+        sql = (
+            "SELECT p.id, p.title, p.link, p.company, p.role, p.badges, p.first_seen, p.last_seen, "
+            f"bm25(post_search, {weights}) AS score, "
+            "snippet(post_search, 4, '[', ']', '…', 12) "
+            "FROM post_search JOIN search_docs d ON d.doc = post_search.rowid "
+            "JOIN posts p ON p.id = d.post_id "
+            "WHERE post_search MATCH ? ORDER BY score LIMIT ?"
+        )
+        with self._lock:
+            try:
+                rows = self.conn.execute(sql, (query, limit)).fetchall()
+            except sqlite3.OperationalError:
+                literal = " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
+                if not literal:
+                    return []
+                rows = self.conn.execute(sql, (literal, limit)).fetchall()
+        hits = []
+        for row in rows:
+            post = _row_to_post(row[:8])
+            post['score'] = -row[8]
+            post['snippet'] = row[9]
+            hits.append(post)
+        return hits
+
+    def crawl_cursor(self, crawl):
+        """Last page checkpointed by an unfinished crawl, or None"""
+        with self._lock:
+            return self.conn.execute("SELECT MAX(page) FROM crawl_pages WHERE crawl = ?", (crawl,)).fetchone()[0]
+
+    def complete_page(self, crawl, page, posts):
+        """Checkpoint a page once all of its posts are recorded"""
+        with phase("state_io"), self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO crawl_pages (crawl, page, post_ids, completed) VALUES (?, ?, ?, ?)",
+                (crawl, page, json.dumps([get_post_id(post) for post in posts]), time.time())
+            )
+
+    def finish_crawl(self, crawl):
+        """Forget a crawl's checkpoints so the next one starts from the beginning"""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM crawl_pages WHERE crawl = ?", (crawl,))
+
+    def get_meta(self, key):
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value WHERE value IS NOT excluded.value",
+                (key, value)
+            )
+
+    def get_high_water(self):
+        """ID of the newest post processed by the last run of the monitor"""
+        return self.get_meta('high_water')
+
+    def set_high_water(self, post_id):
+        self.set_meta('high_water', post_id)
+
+    def compact(self):
+        """Fold the write-ahead log into the main file, vacuuming if much of it is free"""
+        with self._lock:
+            pages = self.conn.execute("PRAGMA page_count").fetchone()[0]
+            free = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if pages and free / pages >= COMPACT_FREE_RATIO:
+                # VACUUM may renumber rowids, which the seen index relies on
+                self.conn.execute("DELETE FROM meta WHERE key = 'seen_index'")
+                self.conn.commit()
+                self.conn.execute("VACUUM")
+                log(f"🧹 Compacted {self.path}: reclaimed {free} of {pages} pages")
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        if self.read_only:
+            with self._lock:
+                self.conn.close()
+            return
+        try:
+            self.compact()
+        except sqlite3.Error as e:
+            log(f"⚠️ Could not compact {self.path}: {e}")
+        if self.index is not None:
+            index_file = self.index.path
+            rebuild = self.index.stale() or self.get_meta('seen_index') != self.index.token
+            self.index.close()
+            self.index = None
+            if rebuild:
+                try:
+                    self._build_index(index_file)
+                except (OSError, ValueError) as e:
+                    log(f"⚠️ Could not rebuild the seen index: {e}")
+        with self._lock:
+            self.conn.close()
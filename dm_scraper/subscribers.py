@@ -0,0 +1,121 @@
+"""Subscriber registry: which chats get which reviews.
+
+SUBSCRIBERS_FILE (default subscribers.json) lists chats and their filters:
+
+    [
+        {"name": "backend", "chat_id": "-1001234567890",
+         "companies": ["Enosis Solutions", "BJIT Limited"], "badges": ["Bad"]},
+        {"name": "pm-watch", "chat_id": "123456789", "roles": ["Product Manager"]}
+    ]
+
+A post matches a subscriber when it matches every field the subscriber
+filters on (company, role, any of the post's badges); values within a field
+are alternatives and comparison ignores case and extra spaces. A subscriber
+without filters gets everything, as CHAT_ID does when it is set.
+
+The filters are compiled into value -> subscribers indexes, so matching a
+post costs a few dict lookups plus the number of hits, however many
+subscribers there are.
+"""
+import json
+
+from .config import ConfigError
+from .metrics import count
+from .util import log
+
+# Subscriber key -> post field it filters on
+FILTERS = {'companies': 'company', 'roles': 'role', 'badges': 'badges'}
+
+
+def normalize(value):
+    return " ".join((value or "").split()).casefold()
+
+
+def _rule_values(subscriber, key):
+    values = subscriber.get(key) or []
+    if isinstance(values, str):
+        values = [values]
+    if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+        raise ConfigError(f"subscriber {subscriber.get('name') or subscriber.get('chat_id')}: "
+                          f"'{key}' must be a list of strings")
+    return {normalize(v) for v in values if normalize(v)}
+
+
+class SubscriberRegistry:
+    """Subscribers with their filters compiled into lookup indexes"""
+
+    def __init__(self, subscribers=()):
+        self.subscribers = []
+        self.indexes = {field: {} for field in FILTERS.values()}
+        self.required = []  # number of fields each subscriber filters on
+        self.match_all = []  # subscribers without filters
+        for subscriber in subscribers:
+            self.add(subscriber)
+
+    def add(self, subscriber):
+        if not subscriber.get('chat_id'):
+            raise ConfigError(f"subscriber {subscriber.get('name') or subscriber} has no chat_id")
+        number = len(self.subscribers)
+        self.subscribers.append({**subscriber, 'chat_id': str(subscriber['chat_id'])})
+        fields = 0
+        for key, field in FILTERS.items():
+            values = _rule_values(subscriber, key)
+            if values:
+                fields += 1
+            for value in values:
+                self.indexes[field].setdefault(value, []).append(number)
+        self.required.append(fields)
+        if not fields:
+            self.match_all.append(number)
+
+    def __len__(self):
+        return len(self.subscribers)
+
+    @property
+    def chat_ids(self):
+        return list(dict.fromkeys(s['chat_id'] for s in self.subscribers))
+
+    def match(self, post):
+        """Chat IDs the post should go to, in registry order and each chat once"""
+        hits = {}
+        for field, index in self.indexes.items():
+            if not index:
+                continue
+            values = post.get(field) or []
+            if isinstance(values, str):
+                values = [values]
+            # A subscriber listing two of the post's badges still counts one field
+            matched = set()
+            for value in values:
+                matched.update(index.get(normalize(value), ()))
+            for number in matched:
+                hits[number] = hits.get(number, 0) + 1
+
+        numbers = self.match_all + [n for n, fields in hits.items() if fields == self.required[n]]
+        if len(numbers) > 1:
+            numbers.sort()
+        chat_ids = list(dict.fromkeys(self.subscribers[n]['chat_id'] for n in numbers))
+        count('subscriber_matches', len(chat_ids))
+        return chat_ids
+
+
+def load_subscribers(chat_id=None, path="subscribers.json"):
+    """Registry from the subscribers file, with chat_id (if set) as a catch-all subscriber"""
+    registry = SubscriberRegistry()
+    if chat_id:
+        registry.add({'name': 'CHAT_ID', 'chat_id': chat_id})
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            subscribers = json.load(f)
+    except FileNotFoundError:
+        return registry
+    except (json.JSONDecodeError, OSError) as e:
+        raise ConfigError(f"could not read {path}: {e}") from e
+
+    if not isinstance(subscribers, list) or not all(isinstance(s, dict) for s in subscribers):
+        raise ConfigError(f"{path} must hold a list of subscriber objects")
+    for subscriber in subscribers:
+        registry.add(subscriber)
+    log(f"👥 Loaded {len(subscribers)} subscribers from {path}")
+    return registry
@@ -0,0 +1,212 @@
+"""Rate-aware Telegram sender.
+
+Messages go out in the order they are sent, paced by token buckets that
+match Telegram's limits: about one message per second per chat, 20 per
+minute in groups and 30 per second overall. A 429 pauses the chat's bucket
+for retry_after and the same message is retried, so there is no fixed sleep
+between messages.
+
+drain_outbox() sends each chat's queue on its own thread through the shared
+sender, so a slow group chat (3 s a message) does not hold back the others.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from .metrics import count, phase
+from .util import log
+
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")
+PRIVATE_CHAT_RATE = 1.0  # messages per second
+GROUP_CHAT_RATE = 20 / 60.0
+GLOBAL_RATE = 30.0
+MAX_RETRIES = 3  # for errors other than 429
+MAX_RATE_LIMITED = 5  # 429s tolerated for a single message
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", "4"))  # chats drained at the same time
+
+
+class TokenBucket:
+    """Blocking token bucket that can also be paused for a fixed time"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available; returns seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return waited
+                    delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds):
+        with self._lock:
+            now = time.monotonic()
+            self.paused_until = max(self.paused_until, now + seconds)
+            self.tokens = 0
+            self.updated = self.paused_until
+
+
+def chat_rate(chat_id):
+    """Groups and channels have negative IDs and a lower per-chat limit"""
+    return GROUP_CHAT_RATE if str(chat_id).startswith('-') else PRIVATE_CHAT_RATE
+
+
+class TelegramSender:
+    """Send sendMessage requests through per-chat and global token buckets"""
+
+    def __init__(self, token, api_url=TELEGRAM_API_URL, global_rate=GLOBAL_RATE):
+        self.url = f"{api_url.rstrip('/')}/bot{token}/sendMessage"
+        self.session = requests.Session()
+        self.global_bucket = TokenBucket(global_rate, capacity=global_rate)
+        self.chat_buckets = {}
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.rate_limited = 0
+        self.waited = 0.0
+        self.started = None
+        self._stats_lock = threading.Lock()
+
+    def _chat_bucket(self, chat_id):
+        with self._lock:
+            bucket = self.chat_buckets.get(chat_id)
+            if bucket is None:
+                bucket = self.chat_buckets[chat_id] = TokenBucket(chat_rate(chat_id))
+            return bucket
+
+    def send(self, chat_id, text, parse_mode='HTML', disable_web_page_preview=False):
+        """Send one message, waiting for the rate limiters; returns True on success"""
+        with phase("telegram"):
+            return self._send(chat_id, text, parse_mode, disable_web_page_preview)
+
+    def _send(self, chat_id, text, parse_mode, disable_web_page_preview):
+        if self.started is None:
+            self.started = time.monotonic()
+        payload = {
+            'chat_id': chat_id,
+            'text': text,
+            'parse_mode': parse_mode,
+            'disable_web_page_preview': disable_web_page_preview
+        }
+        bucket = self._chat_bucket(chat_id)
+        failures = 0
+        rate_limited = 0
+
+        while True:
+            waited = bucket.acquire() + self.global_bucket.acquire()
+            with self._stats_lock:
+                self.waited += waited
+            count('telegram_wait_seconds', waited)
+            count('telegram_requests')
+            try:
+                response = self.session.post(self.url, data=payload, timeout=30)
+            except requests.RequestException as e:
+                log(f"❌ Telegram API error: {e}")
+                response = None
+
+            if response is not None and response.status_code == 200:
+                with self._stats_lock:
+                    self.sent += 1
+                count('telegram_sent')
+                return True
+
+            if response is not None and response.status_code == 429:
+                rate_limited += 1
+                with self._stats_lock:
+                    self.rate_limited += 1
+                count('telegram_429')
+                try:
+                    retry_after = response.json().get('parameters', {}).get('retry_after', 30)
+                except ValueError:
+                    retry_after = 30
+                log(f"⏳ Rate limited. Pausing chat {chat_id} for {retry_after} seconds...")
+                bucket.pause(retry_after)
+                count('telegram_429_wait_seconds', retry_after)
+                if rate_limited < MAX_RATE_LIMITED:
+                    continue
+            else:
+                failures += 1
+                if response is not None:
+                    log(f"❌ Failed to send Telegram message: {response.status_code}")
+                    log(f"Response: {response.text}")
+                if failures < MAX_RETRIES:
+                    log("🔄 Retrying in 5 seconds...")
+                    count('telegram_retries')
+                    bucket.pause(5)
+                    continue
+
+            with self._stats_lock:
+                self.failed += 1
+            count('telegram_failed')
+            return False
+
+    def log_stats(self):
+        if self.started is None:
+            return
+        elapsed = time.monotonic() - self.started
+        rate = self.sent / elapsed if elapsed > 0 else 0.0
+        log(f"📨 Sent {self.sent} messages ({self.failed} failed) in {elapsed:.1f}s "
+            f"({rate:.2f} msg/s), {self.rate_limited} rate-limit pauses, {self.waited:.1f}s waiting on limits")
+
+
+def _drain_chat(store, sender, messages):
+    sent = 0
+    for message in messages:
+        if sender.send(message['chat_id'], message['text'], message['parse_mode'] or 'HTML'):
+            store.mark_sent(message['id'])
+            sent += 1
+        else:
+            store.mark_attempt_failed(message['id'])
+            log(f"❌ Could not deliver queued message for {message['post_id'] or 'digest'} "
+                f"to {message['chat_id']} - leaving the rest of that chat queued")
+            break
+    return sent
+
+
+def drain_outbox(store, sender, workers=OUTBOX_WORKERS):
+    """Send queued messages in order per chat, marking each one sent as soon as it is delivered.
+
+    A chat stops at its first message that cannot be delivered so nothing
+    after it goes out of order; it stays queued for the next run. A chat
+    that already failed in this run is not tried again until then, so one
+    outage counts as one failed run however often the outbox is drained.
+    Different chats are drained concurrently. Returns the number of
+    messages sent.
+    """
+    chats = {}
+    for message in store.pending_messages():
+        chats.setdefault(message['chat_id'], []).append(message)
+    for chat_id in [chat_id for chat_id, messages in chats.items()
+                    if any(message['failed_this_run'] for message in messages)]:
+        log(f"⏭️ Chat {chat_id} failed earlier in this run - its {len(chats.pop(chat_id))} messages wait for the next",
+            verbose=True)
+
+    if len(chats) > 1 and workers > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(chats))) as pool:
+            sent = sum(pool.map(lambda messages: _drain_chat(store, sender, messages), chats.values()))
+    else:
+        sent = sum(_drain_chat(store, sender, messages) for messages in chats.values())
+    store.prune_outbox()
+
+    remaining = store.pending_count()
+    log(f"📬 Outbox: sent {sent} messages, {remaining} still queued")
+    return sent
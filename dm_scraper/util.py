@@ -0,0 +1,22 @@
+import os
+import time
+
+# VERBOSE=0 hides the per-page and per-request lines and keeps the summaries
+VERBOSE = os.getenv("VERBOSE", "1") == "1"
+
+
+def log(msg, verbose=False):
+    """Print msg with a timestamp; verbose=True marks per-page detail"""
+    if verbose and not VERBOSE:
+        return
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {msg}")
+
+
+def atomic_write(path, text):
+    """Replace path with text so readers see the old or the new file, never half of one"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
@@ -0,0 +1,76 @@
+import os
+import tempfile
+
+# Module-level settings are read at import: keep every default file of the
+# package out of the working tree and the logs quiet
+_workdir = tempfile.mkdtemp(prefix='dm_tests_')
+for _name, _file in (('STORE_FILE', 'seen_posts.db'), ('SESSION_FILE', 'cf_session.json'),
+                     ('PAGE_CACHE_FILE', 'page_cache.json')):
+    os.environ[_name] = os.path.join(_workdir, _file)
+os.environ.update(METRICS_FILE='', METRICS_TEXTFILE='', SEEN_INDEX_FILE='', VERBOSE='0',
+                  TELEGRAM_API_URL='http://127.0.0.1:9')
+
+import pytest  # noqa: E402
+import requests  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures')
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.fixture
+def make_response():
+    """Build a requests.Response without a network"""
+    def make(status=200, text="", headers=None):
+        response = requests.Response()
+        response.status_code = status
+        response._content = text.encode('utf-8')
+        response.encoding = 'utf-8'
+        response.headers.update(headers or {})
+        response.url = "https://deshimula.com/"
+        return response
+    return make
+
+
+def make_post(number, title=None, company="Enosis Solutions", role="Software Engineer", badges=("Good",)):
+    """A listing post as the parser returns it"""
+    return {
+        'title': title or f"Review {number}",
+        'link': f"https://deshimula.com/story/{number}/review-{number}",
+        'company': company,
+        'role': role,
+        'badges': list(badges),
+    }
+
+
+class FakeSender:
+    """TelegramSender stand-in: send() succeeds unless the chat is listed in `down`"""
+
+    def __init__(self):
+        self.down = set()
+        self.delivered = []
+        self.calls = 0
+
+    def send(self, chat_id, text, parse_mode='HTML'):
+        self.calls += 1
+        if chat_id in self.down:
+            return False
+        self.delivered.append((chat_id, text))
+        return True
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / 'seen_posts.db')
+
+
+@pytest.fixture
+def store(store_path):
+    from dm_scraper.store import SeenStore
+
+    store = SeenStore(store_path, legacy_file=None)
+    yield store
+    store.close()
@@ -0,0 +1,63 @@
+from conftest import FakeSender, make_post
+from dm_scraper.fetch import BLOCKED, FetchError
+from dm_scraper.pipeline import Notifier, run_pipeline
+from dm_scraper.store import SeenStore
+
+CRAWL = "allpost-2"
+
+
+def page_posts(page):
+    """Three posts per page, newest first: page 2 holds 100-98, page 3 97-95, ..."""
+    first = 100 - (page - 2) * 3
+    return [make_post(n) for n in range(first, first - 3, -1)]
+
+
+def crawl(pages, fail_at=None):
+    for page in pages:
+        if page == fail_at:
+            raise FetchError(f"https://deshimula.com/stories/{page}", BLOCKED)
+        yield page, page_posts(page)
+
+
+def run(store, pages, fail_at=None):
+    sender = FakeSender()
+    summary = run_pipeline(crawl(pages, fail_at), store, Notifier(store, sender, "1"),
+                           checkpoint=lambda page, posts: store.complete_page(CRAWL, page, posts))
+    return summary, sender
+
+
+def test_cursor_survives_reopen_until_finished(store_path):
+    store = SeenStore(store_path, legacy_file=None)
+    assert store.crawl_cursor(CRAWL) is None
+    store.complete_page(CRAWL, 2, page_posts(2))
+    store.complete_page(CRAWL, 3, page_posts(3))
+    store.close()
+
+    store = SeenStore(store_path, legacy_file=None)
+    assert store.crawl_cursor(CRAWL) == 3
+    assert store.crawl_cursor("allpost-5") is None
+    store.finish_crawl(CRAWL)
+    assert store.crawl_cursor(CRAWL) is None
+    store.close()
+
+
+def test_stopped_crawl_resumes_after_last_page(store_path):
+    store = SeenStore(store_path, legacy_file=None)
+    summary, sender = run(store, range(2, 6), fail_at=4)
+    assert summary['stopped'] == BLOCKED
+    assert summary['pages'] == 2
+    # New posts held back for the run's alerts are checkpointed once they are sent
+    assert store.crawl_cursor(CRAWL) == 3
+    assert len(sender.delivered) == 6
+    store.close()
+
+    store = SeenStore(store_path, legacy_file=None)
+    cursor = store.crawl_cursor(CRAWL)
+    summary, sender = run(store, range(cursor + 1, 6))
+    assert summary['stopped'] is None
+    assert summary['pages'] == 2
+    assert summary['new'] == 6  # only pages 4 and 5; nothing before the cursor is crawled again
+    assert len(sender.delivered) == 6
+    assert store.crawl_cursor(CRAWL) == 5
+    assert len(store) == 12
+    store.close()
@@ -0,0 +1,63 @@
+from conftest import make_post
+from dm_scraper.digest import (
+    HEADER_RESERVE, MESSAGE_LIMIT, build_digests, escape_markdown, format_alert, format_digest_entry, render_digest,
+    split_digests, telegram_length,
+)
+
+
+def test_markdown_escapes_only_what_legacy_markdown_can():
+    assert escape_markdown("snake_case *bold* `code` [link]") == "snake\\_case \\*bold\\* \\`code\\` \\[link]"
+    # Legacy Markdown has no backslash escape, so doubling it would show two
+    assert escape_markdown("C:\\Users\\dev") == "C:\\Users\\dev"
+    assert escape_markdown(None) == ""
+
+
+def test_markdown_alert_keeps_a_backslash_single():
+    alert = format_alert(make_post(1, title="Path \\ separator_issue"), parse_mode='Markdown')
+    assert "Path \\ separator\\_issue" in alert
+
+
+def worst_case_posts(count):
+    """Posts at the field limits, full of characters that grow when escaped or count twice in UTF-16"""
+    return [
+        make_post(n, title=f"{n} " + "😀<&>_*" * 60, company="R&D <Labs> " * 20, role="😀" * 150,
+                  badges=["Bad", "Salary_Info"])
+        for n in range(1, count + 1)
+    ]
+
+
+def test_digests_stay_under_the_utf16_limit():
+    posts = worst_case_posts(40)
+    for parse_mode in ('HTML', 'Markdown'):
+        messages = build_digests(posts, parse_mode)
+        assert len(messages) > 1
+        for text in messages:
+            # Astral emoji are two code units: Python's len() would undercount
+            assert telegram_length(text) <= MESSAGE_LIMIT
+            assert telegram_length(text) > len(text)
+        numbers = [number for chunk in split_digests(posts, parse_mode) for number, _ in chunk]
+        assert numbers == list(range(1, 41))
+
+    # Near the edge: any limit that fits one entry is never exceeded
+    posts = posts[:8] + [make_post(n, title="😀" * n) for n in range(9, 60)]
+    largest = max(telegram_length(format_digest_entry(post, 99, 'HTML')) for post in posts)
+    for limit in range(largest + HEADER_RESERVE, MESSAGE_LIMIT + 1, 97):
+        for chunk in split_digests(posts, 'HTML', limit):
+            assert telegram_length(render_digest(chunk, 'HTML', total=len(posts), part=10, parts=10)) <= limit
+
+
+def test_digest_entries_are_escaped_and_shortened():
+    html_entry = format_digest_entry(worst_case_posts(1)[0], 1, 'HTML')
+    assert "<&>" not in html_entry and "&lt;&amp;&gt;" in html_entry
+    assert "R&amp;D &lt;Labs&gt;" in html_entry
+    assert "…" in html_entry
+    markdown_entry = format_digest_entry(worst_case_posts(1)[0], 1, 'Markdown')
+    assert "\\_\\*" in markdown_entry and "Salary\\_Info" in markdown_entry
+
+
+def test_streaming_digests_number_from_start():
+    chunks = split_digests([make_post(n) for n in range(5)], start=11)
+    assert [number for number, _ in chunks[0]] == [11, 12, 13, 14, 15]
+    assert render_digest(chunks[0]).startswith("📰 <b>5 New Reviews (#11-15)</b>")
+    parts = build_digests(worst_case_posts(40))
+    assert parts[0].startswith(f"📰 <b>40 New Reviews (1/{len(parts)})</b>")
@@ -0,0 +1,131 @@
+import pytest
+
+from conftest import read_fixture
+from dm_scraper import fetch as fetch_module
+from dm_scraper import metrics, pipeline
+from dm_scraper.cache import PageCache
+from dm_scraper.fetch import (BLOCKED, EMPTY, ERROR, OK, RATE_LIMITED, CircuitBreaker, FetchError, RateLimiter,
+                              classify)
+
+CHALLENGE = "<html><head><title>Just a moment...</title></head><body>Checking your browser</body></html>"
+BASE_URL = "https://deshimula.com/"
+
+
+def test_classify(make_response):
+    listing = read_fixture('stories_page.html')
+    assert classify(make_response(200, listing)) == OK
+    assert classify(make_response(404, "Not Found")) == OK
+    assert classify(make_response(429)) == RATE_LIMITED
+    assert classify(make_response(403, CHALLENGE)) == BLOCKED
+    assert classify(make_response(503, CHALLENGE)) == BLOCKED
+    assert classify(make_response(200, CHALLENGE)) == BLOCKED
+    assert classify(make_response(200, "", {'cf-mitigated': 'challenge'})) == BLOCKED
+    assert classify(make_response(502)) == ERROR
+
+
+def test_review_text_is_not_a_challenge(make_response):
+    listing = read_fixture('stories_page.html').replace("Layoffs without notice", "HR said: Just a moment...", 1)
+    assert "Just a moment" in listing
+    assert classify(make_response(200, listing)) == OK
+
+
+@pytest.fixture
+def quiet_fetch(monkeypatch):
+    """fetch() with no sleeping and a fresh limiter and breaker; returns the breaker"""
+    breaker = CircuitBreaker(threshold=3, cooldown=0)
+    monkeypatch.setattr(fetch_module, 'breaker', breaker)
+    monkeypatch.setattr(fetch_module, 'limiter', RateLimiter())
+    monkeypatch.setattr(fetch_module.time, 'sleep', lambda seconds: None)
+    return breaker
+
+
+def test_fetch_retries_then_raises(monkeypatch, make_response, quiet_fetch):
+    calls = []
+
+    def get(url, headers):
+        calls.append(url)
+        return make_response(403, CHALLENGE)
+
+    monkeypatch.setattr(fetch_module, '_get', get)
+    with pytest.raises(FetchError) as raised:
+        fetch_module.fetch(BASE_URL)
+    assert raised.value.kind == BLOCKED
+    assert len(calls) == fetch_module.FETCH_RETRIES + 1
+
+
+def test_long_retry_after_fails_at_once(monkeypatch, make_response, quiet_fetch):
+    sleeps = []
+    monkeypatch.setattr(fetch_module.time, 'sleep', sleeps.append)
+    responses = [make_response(429, headers={'Retry-After': '3600'}), make_response(200, "ok")]
+    monkeypatch.setattr(fetch_module, '_get', lambda url, headers: responses.pop(0))
+    with pytest.raises(FetchError) as raised:
+        fetch_module.fetch(BASE_URL)
+    assert raised.value.kind == RATE_LIMITED and "Retry-After 3600s" in str(raised.value)
+    assert len(responses) == 1 and not sleeps
+    # Nor does the shared limiter hold every worker for the hour
+    assert fetch_module.limiter._next_slot - fetch_module.time.monotonic() <= fetch_module.MAX_RETRY_AFTER
+    assert fetch_module.backoff_delay(1, 3600) <= fetch_module.MAX_RETRY_AFTER
+
+
+def test_fetch_recovers_after_a_block(monkeypatch, make_response, quiet_fetch):
+    responses = [make_response(429, headers={'Retry-After': '0'}), make_response(200, "ok")]
+    monkeypatch.setattr(fetch_module, '_get', lambda url, headers: responses.pop(0))
+    assert fetch_module.fetch(BASE_URL).text == "ok"
+    assert quiet_fetch.failures == 0
+
+
+def test_circuit_breaker_opens_and_probes():
+    breaker = CircuitBreaker(threshold=2, cooldown=0)
+    breaker.record(False)
+    assert not breaker.open_until
+    breaker.record(False)
+    assert breaker.open_until
+    breaker.wait()  # cool-down over: this request is the probe
+    assert breaker.probing
+    breaker.record(True)
+    assert not breaker.open_until and not breaker.probing
+
+
+@pytest.fixture
+def page(monkeypatch, tmp_path, make_response):
+    """get_page_posts() on a page served from `body`, without the network or sleeping"""
+    served = {}
+    monkeypatch.setattr(pipeline, 'page_cache', PageCache(str(tmp_path / 'page_cache.json')))
+    monkeypatch.setattr(pipeline, 'fetch', lambda url, headers=None: make_response(*served['response']))
+    monkeypatch.setattr(pipeline.time, 'sleep', lambda seconds: None)
+
+    def get(status, body):
+        served['response'] = (status, body)
+        return pipeline.get_page_posts(pipeline.stories_url(BASE_URL, 2), BASE_URL)
+    return get
+
+
+def test_listing_page_has_posts(page):
+    assert len(page(200, read_fixture('stories_page.html'))) == 12
+
+
+def test_end_of_list(page):
+    assert page(200, read_fixture('stories_empty.html')) == []
+    assert page(404, "Not Found") == []
+
+
+def test_page_without_posts_is_not_the_end(page):
+    # Changed markup: pagination and footer are still there, the posts are not
+    changed = read_fixture('stories_page.html').replace('container mt-5', 'container mt-4')
+    with pytest.raises(FetchError) as raised:
+        page(200, changed)
+    assert raised.value.kind == EMPTY
+    with pytest.raises(FetchError):
+        page(200, "<html><body>Down for maintenance</body></html>")
+
+
+def test_empty_page_retry_is_one_timed_call(page):
+    def calls():
+        data = metrics.report()
+        return data['phases'].get('get_page_posts', {}).get('calls', 0), data['counters'].get('pages_empty', 0)
+
+    timed_before, empty_before = calls()
+    with pytest.raises(FetchError):
+        page(200, "<html><body>Down for maintenance</body></html>")
+    # Fetched twice, timed once
+    assert calls() == (timed_before + 1, empty_before + 2)
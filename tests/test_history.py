@@ -0,0 +1,66 @@
+import gc
+import os
+
+from conftest import make_post
+from dm_scraper.config import Config
+from dm_scraper.history import HistoryWriter, load_history, month_file
+
+JAN = 1767225600  # 2026-01-01 00:00 UTC
+FEB = 1769904000  # 2026-02-01 00:00 UTC
+
+
+class NoStore:
+    def first_seen(self, post_ids):
+        return {}
+
+
+def write_crawl(directory, crawled_at, posts, batch=2):
+    writer = HistoryWriter(str(directory), NoStore(), batch=batch, crawled_at=crawled_at)
+    writer.add(1, posts)
+    writer.flush()
+    return writer
+
+
+def test_rows_filters_and_latest(tmp_path):
+    write_crawl(tmp_path, JAN, [make_post(3), make_post(2, company="  ENOSIS   solutions"), make_post(1, badges=())])
+    write_crawl(tmp_path, FEB, [make_post(4, company="Other", badges=("Bad", "Good")), make_post(3)])
+
+    rows = load_history(str(tmp_path))
+    assert [(row['crawled_at'], row['position'], row['id']) for row in rows] == [
+        (JAN, 1, '3'), (JAN, 2, '2'), (JAN, 3, '1'), (FEB, 1, '4'), (FEB, 2, '3')]
+    assert rows[2]['badges'] == []
+    assert rows[3]['badges'] == ["Bad", "Good"]
+
+    assert [row['id'] for row in load_history(str(tmp_path), company="enosis solutions")] == ['3', '2', '1', '3']
+    assert [row['id'] for row in load_history(str(tmp_path), badge="bad")] == ['4']
+    assert [row['id'] for row in load_history(str(tmp_path), since="2026-02-01")] == ['4', '3']
+    assert [row['id'] for row in load_history(str(tmp_path), until="2026-01-31")] == ['3', '2', '1']
+    latest = load_history(str(tmp_path), latest=True)
+    assert sorted((row['id'], row['crawled_at']) for row in latest) == [
+        ('1', JAN), ('2', JAN), ('3', FEB), ('4', FEB)]
+
+
+def test_damaged_tail_keeps_full_batches(tmp_path):
+    write_crawl(tmp_path, JAN, [make_post(n) for n in (5, 4, 3, 2)])
+    path = month_file(str(tmp_path), JAN)
+    whole = os.path.getsize(path)
+    write_crawl(tmp_path, JAN, [make_post(n) for n in (9, 8)])
+    with open(path, 'r+b') as f:
+        f.truncate(whole + (os.path.getsize(path) - whole) // 2)
+
+    assert [row['id'] for row in load_history(str(tmp_path))] == ['5', '4', '3', '2']
+
+
+def test_load_leaves_garbage_collection_alone(tmp_path):
+    write_crawl(tmp_path, JAN, [make_post(1)])
+    assert gc.isenabled()
+    load_history(str(tmp_path))
+    assert gc.isenabled()
+
+
+def test_history_is_opt_in_for_the_monitor():
+    archive = {"HISTORY_DIR": "history"}  # allpost.py's default
+    assert Config(environ={}).history_dir == ""
+    assert Config(environ={}, defaults=archive).history_dir == "history"
+    assert Config(environ={'HISTORY_DIR': "archive/history"}).history_dir == "archive/history"
+    assert Config(environ={'HISTORY_DIR': ""}, defaults=archive).history_dir == ""
@@ -0,0 +1,50 @@
+from conftest import FakeSender
+from dm_scraper import fetch, metrics, monitor
+from dm_scraper.config import Config
+from dm_scraper.telegram import drain_outbox
+
+
+def test_daemon_retries_outbox_every_poll(store, monkeypatch):
+    config = Config(environ={'CHAT_ID': "1", 'POLL_MIN_INTERVAL': "0", 'POLL_MAX_INTERVAL': "0"})
+    sender = FakeSender()
+    sender.down.add('1')
+    store.enqueue([{'post_id': None, 'chat_id': 1, 'text': "held over", 'parse_mode': 'Markdown'}])
+    drain_outbox(store, sender)  # run_monitor's startup drain, during the outage
+    sender.down.clear()
+
+    handlers = {}
+    monkeypatch.setattr(monitor.signal, 'signal', lambda sig, handler: handlers.setdefault(sig, handler))
+    polls = []
+
+    def quiet_poll(config, store, sender, incremental=None):
+        polls.append(list(sender.delivered))
+        if len(polls) == 2:
+            handlers[monitor.signal.SIGTERM]()
+        return 0
+
+    monkeypatch.setattr(monitor, 'check_for_new_posts', quiet_poll)
+    monitor.run_daemon(config, store, sender)
+    # Nothing new was found, yet the second poll sent the message before scraping
+    assert polls == [[], [('1', "held over")]]
+    assert store.pending_count() == 0
+
+
+def test_each_poll_reports_only_itself(store, monkeypatch):
+    config = Config(environ={'CHAT_ID': "1", 'POLL_MIN_INTERVAL': "0", 'POLL_MAX_INTERVAL': "0"})
+    handlers = {}
+    monkeypatch.setattr(monitor.signal, 'signal', lambda sig, handler: handlers.setdefault(sig, handler))
+    reports = []
+
+    def poll(config, store, sender, incremental=None):
+        metrics.count('pages_scraped')
+        fetch._fetch_times.append(0.1)
+        if len(reports) == 2:
+            handlers[monitor.signal.SIGTERM]()
+        return 0
+
+    monkeypatch.setattr(monitor, 'check_for_new_posts', poll)
+    monkeypatch.setattr(monitor, 'write_report', lambda script: reports.append(metrics.report(script)))
+    monitor.run_daemon(config, store, FakeSender())
+    # The first poll shares the startup's run; every later one starts from zero
+    assert [report['counters']['pages_scraped'] for report in reports[1:]] == [1, 1]
+    assert fetch._fetch_times == [0.1]
@@ -0,0 +1,61 @@
+from conftest import FakeSender, make_post
+from dm_scraper.pipeline import Notifier, diff_pages, diff_posts, run_pipeline
+from dm_scraper.subscribers import SubscriberRegistry
+
+
+def test_diff_posts_splits_new_and_edited(store):
+    store.add_posts([make_post(n) for n in (1, 2, 3)])
+    listing = [make_post(4), make_post(3), make_post(2, title="Review 2, edited"), make_post(1, badges=["Bad"]),
+               make_post(4)]
+    found = set()
+    new_posts, updated_posts = diff_posts(listing, store, found)
+    assert [post['link'] for post in new_posts] == [make_post(4)['link']]
+    assert [post['title'] for post in updated_posts] == ["Review 2, edited", "Review 1"]
+    # A post the listing shifted onto the next page is not counted again
+    assert diff_posts([make_post(4), make_post(2, title="Review 2, edited")], store, found) == ([], [])
+
+
+def test_reseed_reports_nothing(store):
+    store.add_posts([make_post(1)])
+    pages = [(1, [make_post(2), make_post(1, title="Edited")])]
+    assert [(page, new, updated) for page, _, new, updated in diff_pages(pages, store, reseed=True)] == [(1, [], [])]
+
+
+def run(store, posts, edit_alerts=True, subscribers="1", threshold=10):
+    sender = FakeSender()
+    notifier = Notifier(store, sender, subscribers, edit_alerts=edit_alerts, threshold=threshold)
+    summary = run_pipeline([(1, posts)], store, notifier)
+    return summary, sender.delivered
+
+
+def test_edit_alert_shows_the_old_value_once(store):
+    store.add_posts([make_post(1), make_post(2)])
+    summary, delivered = run(store, [make_post(1, title="Review 1, <updated>"), make_post(2)])
+    assert (summary['new'], summary['updated'], summary['sent']) == (0, 1, 1)
+    [(chat_id, text)] = delivered
+    assert chat_id == '1' and "Review Edited" in text
+    assert "Review 1, &lt;updated&gt;" in text and "(was: Review 1)" in text
+    assert "Company:</b> Enosis Solutions\n" in text  # unchanged fields show no old value
+    assert store.get('1')['title'] == "Review 1, <updated>"
+
+    # Recorded, so the same listing is not an edit next run
+    summary, delivered = run(store, [make_post(1, title="Review 1, <updated>"), make_post(2)])
+    assert (summary['updated'], delivered) == (0, [])
+
+
+def test_edits_recorded_without_alerts_when_off(store):
+    store.add_posts([make_post(1)])
+    summary, delivered = run(store, [make_post(1, role="Team Lead")], edit_alerts=False)
+    assert (summary['updated'], delivered) == (1, [])
+    assert store.get('1')['role'] == "Team Lead"
+
+
+def test_edit_alerts_follow_filters_and_threshold(store):
+    store.add_posts([make_post(n) for n in range(1, 6)])
+    subscribers = SubscriberRegistry([{'chat_id': "7", 'badges': ["Bad"]}, {'chat_id': "8", 'companies': ["Other"]}])
+    edited = [make_post(n, badges=["Bad"]) for n in range(1, 6)]
+    summary, delivered = run(store, edited, subscribers=subscribers, threshold=3)
+    # A wave of edits past the threshold is only recorded; chat 8's filter matches none of them
+    assert summary['updated'] == 5
+    assert [chat_id for chat_id, _ in delivered] == ['7', '7', '7']
+    assert all(store.get(str(n))['badges'] == ["Bad"] for n in range(1, 6))
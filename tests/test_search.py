@@ -0,0 +1,42 @@
+import os
+import sqlite3
+
+from conftest import make_post
+from dm_scraper import search
+from dm_scraper.store import SeenStore, content_file
+
+
+def snapshot(*paths):
+    """The database files plus the size of any write-ahead log (a reader may leave an empty one)"""
+    files = {}
+    for path in paths:
+        with open(path, 'rb') as f:
+            files[path] = f.read()
+        if os.path.exists(path + '-wal'):
+            files[path + '-wal'] = os.path.getsize(path + '-wal')
+    return files
+
+
+def test_cli_never_writes_the_store(store_path, capsys):
+    store = SeenStore(store_path, legacy_file=None)
+    store.add_posts([make_post(n, title=f"Backend review {n}") for n in range(200)])
+    store.close()
+    # Free pages that a compacting close() would VACUUM away
+    conn = sqlite3.connect(store_path)
+    with conn:
+        conn.execute("DELETE FROM posts WHERE CAST(id AS INTEGER) >= 10")
+    conn.close()
+    before = snapshot(store_path, content_file(store_path))
+
+    assert search.main(["backend", "--db", store_path]) == 0
+    assert "10 hits from 10 posts" in capsys.readouterr().out
+    after = snapshot(store_path, content_file(store_path))
+    assert {path: data for path, data in after.items() if not path.endswith('-wal')} == before
+    assert not any(after[path] for path in after if path.endswith('-wal'))
+
+
+def test_cli_reports_a_missing_store(tmp_path, capsys):
+    missing = str(tmp_path / 'missing.db')
+    assert search.main(["backend", "--db", missing]) == 1
+    assert "Could not open" in capsys.readouterr().out
+    assert not (tmp_path / 'missing.db').exists()
@@ -0,0 +1,25 @@
+from conftest import make_post
+from dm_scraper.store import SeenStore
+
+
+def test_index_sees_posts_stored_after_the_build(tmp_path):
+    db = str(tmp_path / 'seen_posts.db')
+    index_file = str(tmp_path / 'seen_index.bin')
+    store = SeenStore(db, legacy_file=None, index_file=index_file)
+    store.add_posts([make_post(n) for n in range(100)])
+    assert '50' in store
+    assert '500' not in store
+    assert set(store.fingerprints(['99', '100', '101'])) == {'99'}
+    store.close()
+
+    # Reopened: the file was rebuilt or is caught up from the rowids
+    store = SeenStore(db, legacy_file=None, index_file=index_file)
+    store.add_posts([make_post(100)])
+    assert set(store.fingerprints(['99', '100', '101'])) == {'99', '100'}
+    store.close()
+
+
+def test_index_is_off_by_default(tmp_path):
+    store = SeenStore(str(tmp_path / 'seen_posts.db'), legacy_file=None)
+    assert store.index is None
+    store.close()
@@ -0,0 +1,61 @@
+import time
+
+import pytest
+
+from dm_scraper.parse import Post
+from dm_scraper.shard import ShardBoard, crawl_shard, iter_sharded_pages
+
+CRAWL = "allpost:2-11"
+LAST_SITE_PAGE = 9
+
+
+def page_url(page):
+    return f"https://deshimula.com/stories/{page}"
+
+
+def get_posts(url):
+    page = int(url.rsplit('/', 1)[1])
+    if page > LAST_SITE_PAGE:
+        return []
+    return [Post(f"Review {page}-{n}", f"https://deshimula.com/story/{page * 10 + n}/r", "Enosis", "SE", ("Good",))
+            for n in range(3)]
+
+
+@pytest.fixture
+def board(tmp_path):
+    board = ShardBoard(str(tmp_path / 'crawl_shards.db'), lease_seconds=0.2)
+    board.plan(CRAWL, 2, 11, shard_size=4)
+    yield board
+    board.close()
+
+
+def test_plan_only_once(board):
+    assert not board.plan(CRAWL, 2, 11, shard_size=4)
+    assert board.remaining(CRAWL) == 3
+
+
+def test_expired_lease_is_reclaimed(board):
+    shard = board.claim(CRAWL, "a")
+    assert shard == (2, 5)
+    assert board.claim(CRAWL, "b") == (6, 9)  # a's lease still holds
+    assert board.save_page(CRAWL, shard, 2, get_posts(page_url(2)), "a")
+
+    time.sleep(0.3)
+    assert board.claim(CRAWL, "c") == (2, 5)  # a stopped renewing; the first expired shard comes back
+    assert not board.save_page(CRAWL, shard, 3, get_posts(page_url(3)), "a")
+    assert board.get_page(CRAWL, 2) == get_posts(page_url(2))  # pages a saved are kept
+
+
+def test_dead_worker_shard_is_finished_by_the_merger(board):
+    board.claim(CRAWL, "crashed")
+    time.sleep(0.3)
+    pages = list(iter_sharded_pages(board, CRAWL, get_posts, page_url, 2, worker="merger"))
+    assert [page for page, _ in pages] == list(range(2, LAST_SITE_PAGE + 1))
+    assert all(posts == get_posts(page_url(page)) for page, posts in pages)
+    assert board.last_page(CRAWL) == LAST_SITE_PAGE  # the empty page 10 ended the crawl
+    assert board.remaining(CRAWL) == 0
+
+
+def test_crawl_shard_completes(board):
+    assert crawl_shard(board, CRAWL, get_posts, page_url, "a")
+    assert board.remaining(CRAWL) == 2
@@ -0,0 +1,125 @@
+import json
+import sqlite3
+
+from conftest import make_post
+from dm_scraper.store import SeenStore, content_file
+
+
+def test_migrates_legacy_json(tmp_path, store_path):
+    legacy = tmp_path / 'seen_posts.json'
+    legacy.write_text(json.dumps([make_post(n) for n in (12, 11, 10)]), encoding='utf-8')
+    store = SeenStore(store_path, legacy_file=str(legacy))
+    assert len(store) == 3
+    assert '11' in store
+    assert store.get_high_water() == '12'  # the buffer was newest first
+    assert not store.needs_reseed()
+    store.close()
+
+    # Only once: later edits to the file are ignored
+    legacy.write_text(json.dumps([make_post(13)]), encoding='utf-8')
+    store = SeenStore(store_path, legacy_file=str(legacy))
+    assert len(store) == 3
+    store.close()
+
+
+def test_unreadable_legacy_json_reseeds(tmp_path, store_path):
+    legacy = tmp_path / 'seen_posts.json'
+    legacy.write_text('[{"title": ', encoding='utf-8')
+    store = SeenStore(store_path, legacy_file=str(legacy))
+    assert len(store) == 0
+    assert store.needs_reseed()
+    store.close()
+
+
+def test_rekeys_title_link_ids(store_path):
+    store = SeenStore(store_path, legacy_file=None)
+    store.add_posts([make_post(7)])
+    old_id = f"Review 7_{make_post(7)['link']}"
+    with store.conn:
+        store.conn.execute("UPDATE posts SET id = ? WHERE id = '7'", (old_id,))
+        store.conn.execute("UPDATE search_docs SET post_id = ? WHERE post_id = '7'", (old_id,))
+        store.conn.execute("DELETE FROM meta WHERE key = 'id_scheme'")
+    store.close()
+
+    store = SeenStore(store_path, legacy_file=None)
+    assert '7' in store and len(store) == 1
+    store.close()
+
+
+def test_merged_title_edit_is_searchable(store_path):
+    store = SeenStore(store_path, legacy_file=None)
+    store.add_posts([make_post(7), make_post(8, title="Review 7, salary edited")])
+    # The title_link scheme stored the edited title as a second post
+    link = make_post(7)['link']
+    renames = (('7', f"Review 7_{link}", 1.0), ('8', f"Review 7, salary edited_{link}", 2.0))
+    with store.conn:
+        for post_id, old_id, seen in renames:
+            store.conn.execute("UPDATE posts SET id = ?, link = ?, first_seen = ?, last_seen = ? WHERE id = ?",
+                               (old_id, link, seen, seen, post_id))
+            store.conn.execute("UPDATE search_docs SET post_id = ? WHERE post_id = ?", (old_id, post_id))
+        store.conn.execute("DELETE FROM meta WHERE key = 'id_scheme'")
+    store.close()
+
+    store = SeenStore(store_path, legacy_file=None)
+    assert len(store) == 1
+    assert [hit['id'] for hit in store.search("salary")] == ['7']
+    assert store.get('7')['first_seen'] == 1.0
+    store.close()
+
+
+def test_run_with_nothing_new_leaves_the_store_unchanged(store_path):
+    posts = [make_post(n) for n in range(20)]
+    store = SeenStore(store_path, legacy_file=None)
+    store.add_posts(posts)
+    store.set_high_water('19')
+    store.close()
+    with open(store_path, 'rb') as f:
+        before = f.read()
+
+    store = SeenStore(store_path, legacy_file=None)
+    assert store.add_posts(posts) == 0
+    store.set_high_water('19')
+    store.prune_outbox()
+    store.close()
+    with open(store_path, 'rb') as f:
+        assert f.read() == before
+
+
+def test_edit_is_recorded(store_path):
+    store = SeenStore(store_path, legacy_file=None)
+    store.add_posts([make_post(3)])
+    first = store.get('3')
+    store.add_posts([make_post(3, title="Review 3, edited")])
+    edited = store.get('3')
+    assert edited['title'] == "Review 3, edited"
+    assert edited['last_seen'] >= first['last_seen']
+    store.close()
+
+
+def test_bulky_tables_live_in_the_content_file(store_path):
+    store = SeenStore(store_path, legacy_file=None)
+    store.enqueue([{'post_id': '1', 'chat_id': 1, 'text': "hello"}], [make_post(1)])
+    store.save_content('1', "the salary was always late")
+    store.mark_sent(store.pending_messages()[0]['id'])
+    assert [hit['id'] for hit in store.search("salary")] == ['1']
+    store.close()
+
+    conn = sqlite3.connect(store_path)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert not tables & {'post_content', 'post_search', 'search_docs'}
+    assert conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0] == 0
+    conn.close()
+    conn = sqlite3.connect(content_file(store_path))
+    assert conn.execute("SELECT COUNT(*) FROM sent_messages").fetchone()[0] == 1
+    conn.close()
+
+
+def test_lost_content_file_is_rebuilt(tmp_path, store_path):
+    store = SeenStore(store_path, legacy_file=None)
+    store.add_posts([make_post(5, title="Toxic culture")])
+    store.close()
+    (tmp_path / 'seen_posts-content.db').write_bytes(b"not a database" * 100)
+
+    store = SeenStore(store_path, legacy_file=None)
+    assert [hit['id'] for hit in store.search("toxic")] == ['5']
+    store.close()
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from conftest import make_post
+from dm_scraper.config import ConfigError
+from dm_scraper.subscribers import SubscriberRegistry, load_subscribers
+
+
+@pytest.fixture
+def registry():
+    return SubscriberRegistry([
+        {'name': "backend-bad", 'chat_id': 10, 'companies': ["Enosis Solutions", "BJIT Limited"], 'badges': ["Bad"]},
+        {'name': "pm", 'chat_id': 20, 'roles': "Product Manager"},
+        {'name': "everything", 'chat_id': 30},
+        {'name': "salary", 'chat_id': 40, 'badges': ["Salary Info", "Bad"]},
+        {'name': "backend-bad-again", 'chat_id': 10, 'companies': ["  enosis   SOLUTIONS "]},
+    ])
+
+
+def test_every_filtered_field_must_match(registry):
+    assert registry.match(make_post(1, company="BJIT Limited", badges=["Bad"])) == ['10', '30', '40']
+    # The company alone is not enough for a subscriber that also filters on badges
+    assert registry.match(make_post(2, company="BJIT Limited", badges=["Good"])) == ['30']
+    assert registry.match(make_post(3, company="Other", badges=["Bad"])) == ['30', '40']
+
+
+def test_values_are_alternatives_and_normalized(registry):
+    post = make_post(1, company="ENOSIS solutions", role="product  manager", badges=["Good"])
+    # Ordered by the subscriber that matched: chat 10 only through its last entry here
+    assert registry.match(post) == ['20', '30', '10']
+
+
+def test_several_matching_badges_count_one_field(registry):
+    post = make_post(1, company="Enosis Solutions", badges=["Bad", "Salary Info"])
+    # Chat 10 matches through both of its entries and is still listed once
+    assert registry.match(post) == ['10', '30', '40']
+    assert registry.match(make_post(2, company="Other", badges=[])) == ['30']
+
+
+def test_catch_all_subscribers_get_everything():
+    registry = SubscriberRegistry([{'chat_id': "1"}, {'chat_id': "2", 'companies': []}])
+    assert registry.match(make_post(1)) == ['1', '2']
+    assert SubscriberRegistry().match(make_post(1)) == []
+
+
+def test_load_adds_chat_id_as_catch_all(tmp_path):
+    path = tmp_path / 'subscribers.json'
+    path.write_text(json.dumps([{'chat_id': "5", 'roles': ["QA"]}]), encoding='utf-8')
+    registry = load_subscribers("1", str(path))
+    assert registry.chat_ids == ['1', '5']
+    assert registry.match(make_post(1, role="qa")) == ['1', '5']
+    assert load_subscribers("1", str(tmp_path / 'missing.json')).chat_ids == ['1']
+
+
+def test_bad_subscribers_are_config_errors(tmp_path):
+    with pytest.raises(ConfigError):
+        SubscriberRegistry([{'name': "no chat"}])
+    with pytest.raises(ConfigError):
+        SubscriberRegistry([{'chat_id': 1, 'badges': [1, 2]}])
+    path = tmp_path / 'subscribers.json'
+    path.write_text("{not json", encoding='utf-8')
+    with pytest.raises(ConfigError):
+        load_subscribers(None, str(path))
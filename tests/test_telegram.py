@@ -0,0 +1,49 @@
+from conftest import FakeSender
+from dm_scraper.store import MAX_SEND_ATTEMPTS
+from dm_scraper.telegram import drain_outbox
+
+
+def message(chat_id, text):
+    return {'post_id': None, 'chat_id': chat_id, 'text': text, 'parse_mode': 'HTML'}
+
+
+def outbox(store):
+    return store.conn.execute("SELECT chat_id, text, status, attempts FROM outbox ORDER BY id").fetchall()
+
+
+def test_outage_counts_once_per_run(store):
+    sender = FakeSender()
+    sender.down.add('1')
+    store.enqueue([message(1, "first"), message(2, "other chat")])
+    for _ in range(5):  # every digest flush drains the outbox again
+        drain_outbox(store, sender, workers=1)
+        store.enqueue([message(1, "later")])
+    assert sender.calls == 2  # chat 1 once, chat 2 once
+    assert sender.delivered == [('2', "other chat")]
+    assert outbox(store)[0] == ('1', "first", 'pending', 1)
+
+
+def test_order_kept_and_sent_next_run(store):
+    sender = FakeSender()
+    sender.down.add('1')
+    store.enqueue([message(1, "a"), message(1, "b")])
+    drain_outbox(store, sender, workers=1)
+
+    store.start_run()
+    sender.down.clear()
+    assert drain_outbox(store, sender, workers=1) == 2
+    assert sender.delivered == [('1', "a"), ('1', "b")]
+    assert store.pending_count() == 0
+
+
+def test_given_up_after_max_failed_runs(store):
+    sender = FakeSender()
+    sender.down.add('1')
+    store.enqueue([message(1, "never")])
+    for run in range(MAX_SEND_ATTEMPTS):
+        if run:
+            store.start_run()
+        drain_outbox(store, sender, workers=1)
+        drain_outbox(store, sender, workers=1)
+    assert outbox(store) == [('1', "never", 'failed', MAX_SEND_ATTEMPTS)]
+    assert store.pending_count() == 0